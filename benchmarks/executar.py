@@ -0,0 +1,244 @@
+"""Benchmarks do pipeline de dados e das funções de gráfico das páginas.
+
+Uso, a partir da raiz do projeto:
+
+    python -m benchmarks.executar --tamanhos 10000 100000
+    python -m benchmarks.executar --salvar-baseline
+    python -m benchmarks.executar --baseline benchmarks/resultados/baseline.json
+
+Para cada tamanho é gerado um CSV sintético (fome_zero.sintetico) com o schema
+do zomato.csv. Cada função é medida em tempo de parede (melhor de N execuções),
+pico de memória e blocos de memória alocados durante a chamada que continuam
+vivos ao final (blocos_vivos_ao_final). O tracemalloc só expõe blocos vivos:
+o total de alocações feitas não é medido, e alocações temporárias aparecem
+apenas no pico. O JSON de saída descreve cada métrica em 'metricas'.
+"""
+import argparse
+import gc
+import importlib.util
+import inspect
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import streamlit.logger
+
+from fome_zero.dados import pipeline_dados
+from fome_zero.agregados import construir_cubo, construir_cubo_culinarias, construir_histograma_notas
+from fome_zero.culinarias import construir_indice_culinarias, mascara_culinaria
+from fome_zero.ranking import construir_ranking
+from fome_zero.filtros import construir_indice_filtros
+from fome_zero.espacial import construir_indice_espacial, posicoes_no_retangulo
+from fome_zero.consultas import calcular_metricas
+from fome_zero.mapa import (
+    MUNDO_INTEIRO, ORCAMENTO_PONTOS_VIEWPORT, TAMANHO_CELULA_GRADE, conteudo_camada, montar_camada
+)
+from fome_zero.sintetico import construir_perfil, gerar_arquivo
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGINAS = ['pages/countries.py', 'pages/cities.py', 'pages/cuisines.py']
+PREFIXOS_FUNCOES = ('grafico_', 'tabela_', 'destaques_')
+
+TAMANHOS_PADRAO = [10_000, 100_000, 1_000_000, 10_000_000]
+REPETICOES_PADRAO = 3
+TOLERANCIA_PADRAO = 0.2
+# Diferenças de tempo abaixo disto são ruído de medição, não regressão.
+LIMIAR_SEGUNDOS = 0.02
+# Próxima da proporção de linhas repetidas do zomato.csv original.
+TAXA_DUPLICADOS = 0.08
+
+DIRETORIO_RESULTADOS = os.path.join(RAIZ_PROJETO, 'benchmarks', 'resultados')
+
+# Gravado junto com os resultados, para quem lê o JSON sem ler este arquivo.
+DESCRICAO_METRICAS = {
+    'segundos': 'Melhor tempo de parede entre as repetições.',
+    'segundos_mediana': 'Mediana do tempo de parede entre as repetições.',
+    'pico_bytes': 'Pico de memória alocada pelo Python durante uma chamada (tracemalloc).',
+    'blocos_vivos_ao_final': (
+        'Blocos alocados durante a chamada que continuam vivos ao final dela, incluindo o resultado. '
+        'Não é o total de alocações: o tracemalloc não conta blocos já liberados.'
+    ),
+}
+
+# =========================
+# Módulo: Dados Sintéticos
+# =========================
+
+def gerar_csv_sintetico(num_linhas, caminho_arquivo, perfil, semente=0):
+    gerar_arquivo(
+        caminho_arquivo, num_linhas, 'csv', perfil=perfil,
+        taxa_duplicados=TAXA_DUPLICADOS, semente=semente,
+    )
+
+# =========================
+# Módulo: Medição
+# =========================
+
+def medir(funcao, repeticoes):
+    gc.collect()
+    tracemalloc.start()
+    resultado = funcao()
+    _, pico_bytes = tracemalloc.get_traced_memory()
+    blocos_vivos_ao_final = sum(estatistica.count for estatistica in tracemalloc.take_snapshot().statistics('filename'))
+    tracemalloc.stop()
+    del resultado
+
+    tempos = []
+    for _ in range(repeticoes):
+        gc.collect()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return {
+        'segundos': min(tempos),
+        'segundos_mediana': float(np.median(tempos)),
+        'pico_bytes': pico_bytes,
+        'blocos_vivos_ao_final': blocos_vivos_ao_final,
+    }
+
+def carregar_pagina(caminho_relativo):
+    nome = 'pagina_' + os.path.splitext(os.path.basename(caminho_relativo))[0]
+    spec = importlib.util.spec_from_file_location(nome, os.path.join(RAIZ_PROJETO, caminho_relativo))
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+def funcoes_das_paginas():
+    for caminho in PAGINAS:
+        modulo = carregar_pagina(caminho)
+        for nome in sorted(vars(modulo)):
+            funcao = getattr(modulo, nome)
+            if nome.startswith(PREFIXOS_FUNCOES) and callable(funcao) and funcao.__module__ == modulo.__name__:
+                yield f'{os.path.basename(caminho)}:{nome}', funcao
+
+def argumento_da_funcao(funcao, entradas):
+    # O primeiro parâmetro indica qual estrutura a função consome.
+    primeiro = next(iter(inspect.signature(funcao).parameters))
+    return entradas.get(primeiro, entradas['df'])
+
+def medir_mapa(df, medidas, repeticoes):
+    # O caminho do mapa da home: seleção dos pontos visíveis pelo índice
+    # espacial, conteúdo da camada (grade grossa para a seleção inteira,
+    # marcadores quando poucos pontos estão visíveis) e a camada do folium
+    # montada a cada rerun.
+    indice = construir_indice_espacial(df)
+    medidas['posicoes_no_retangulo'] = medir(lambda: posicoes_no_retangulo(indice, *MUNDO_INTEIRO), repeticoes)
+    visiveis = df.take(posicoes_no_retangulo(indice, *MUNDO_INTEIRO))
+    poucos = visiveis.head(ORCAMENTO_PONTOS_VIEWPORT)
+    medidas['conteudo_camada_grade'] = medir(lambda: conteudo_camada(visiveis, TAMANHO_CELULA_GRADE), repeticoes)
+    medidas['conteudo_camada_marcadores'] = medir(lambda: conteudo_camada(poucos, TAMANHO_CELULA_GRADE), repeticoes)
+    grade, marcadores = conteudo_camada(visiveis, TAMANHO_CELULA_GRADE), conteudo_camada(poucos, TAMANHO_CELULA_GRADE)
+    medidas['montar_camada_grade'] = medir(lambda: montar_camada(grade), repeticoes)
+    medidas['montar_camada_marcadores'] = medir(lambda: montar_camada(marcadores), repeticoes)
+
+def medir_tamanho(num_linhas, repeticoes, diretorio, perfil):
+    caminho_csv = os.path.join(diretorio, f'zomato_{num_linhas}.csv')
+    gerar_csv_sintetico(num_linhas, caminho_csv, perfil)
+    medidas = {}
+
+    medidas['pipeline_dados'] = medir(lambda: pipeline_dados(caminho_csv), repeticoes)
+    df = pipeline_dados(caminho_csv)
+    medidas['construir_cubo'] = medir(lambda: construir_cubo(df), repeticoes)
+    medidas['construir_histograma_notas'] = medir(lambda: construir_histograma_notas(df), repeticoes)
+    medidas['construir_ranking'] = medir(lambda: construir_ranking(df), repeticoes)
+    medidas['construir_indice_culinarias'] = medir(lambda: construir_indice_culinarias(df), repeticoes)
+    medidas['construir_indice_filtros'] = medir(lambda: construir_indice_filtros(df), repeticoes)
+    medidas['construir_indice_espacial'] = medir(lambda: construir_indice_espacial(df), repeticoes)
+    medidas['calcular_metricas'] = medir(lambda: calcular_metricas(df), repeticoes)
+    medir_mapa(df, medidas, repeticoes)
+
+    indice_culinarias = construir_indice_culinarias(df)
+    medidas['construir_cubo_culinarias'] = medir(lambda: construir_cubo_culinarias(df, indice_culinarias), repeticoes)
+    entradas = {
+        'df': df,
+        'cubo': construir_cubo(df),
+        'cubo_culinarias': construir_cubo_culinarias(df, indice_culinarias),
+        'histograma': construir_histograma_notas(df),
+        'ranking': construir_ranking(df),
+        'ranking_italiano': construir_ranking(df, mascara_culinaria(indice_culinarias, 'italian', len(df))),
+    }
+    for nome, funcao in funcoes_das_paginas():
+        argumento = argumento_da_funcao(funcao, entradas)
+        medidas[nome] = medir(lambda: funcao(argumento, 10), repeticoes)
+    os.remove(caminho_csv)
+    return medidas
+
+# =========================
+# Módulo: Resultados e Baseline
+# =========================
+
+def descrever_ambiente():
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'maquina': platform.machine(),
+        'processadores': os.cpu_count(),
+    }
+
+def comparar_com_baseline(resultados, baseline, tolerancia):
+    regressoes = []
+    for tamanho, medidas in resultados['resultados'].items():
+        for nome, medida in medidas.items():
+            referencia = baseline['resultados'].get(tamanho, {}).get(nome)
+            if referencia is None:
+                continue
+            if (medida['segundos'] > referencia['segundos'] * (1 + tolerancia)
+                    and medida['segundos'] - referencia['segundos'] > LIMIAR_SEGUNDOS):
+                regressoes.append(f"{tamanho} linhas, {nome}: tempo {referencia['segundos']:.4f}s -> {medida['segundos']:.4f}s")
+            if medida['pico_bytes'] > referencia['pico_bytes'] * (1 + tolerancia):
+                regressoes.append(f"{tamanho} linhas, {nome}: pico {referencia['pico_bytes']} -> {medida['pico_bytes']} bytes")
+    return regressoes
+
+def salvar_json(dados, caminho_arquivo):
+    os.makedirs(os.path.dirname(caminho_arquivo), exist_ok=True)
+    with open(caminho_arquivo, 'w', encoding='utf-8') as arquivo:
+        json.dump(dados, arquivo, indent=2, ensure_ascii=False)
+
+def ler_argumentos(argumentos):
+    parser = argparse.ArgumentParser(description="Benchmarks do painel Fome Zero.")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO)
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES_PADRAO)
+    parser.add_argument('--saida', default=os.path.join(DIRETORIO_RESULTADOS, 'ultimo.json'))
+    parser.add_argument('--baseline', default=os.path.join(DIRETORIO_RESULTADOS, 'baseline.json'))
+    parser.add_argument('--salvar-baseline', action='store_true')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO)
+    return parser.parse_args(argumentos)
+
+def main(argumentos=None):
+    opcoes = ler_argumentos(argumentos)
+    # As páginas chamam st.* fora de uma sessão; os avisos do Streamlit só poluem a saída.
+    streamlit.logger.set_log_level('error')
+
+    resultados = {'ambiente': descrever_ambiente(), 'metricas': DESCRICAO_METRICAS, 'resultados': {}}
+    perfil = construir_perfil()
+    with tempfile.TemporaryDirectory() as diretorio:
+        for tamanho in opcoes.tamanhos:
+            print(f'Medindo {tamanho} linhas...', flush=True)
+            resultados['resultados'][str(tamanho)] = medir_tamanho(tamanho, opcoes.repeticoes, diretorio, perfil)
+    salvar_json(resultados, opcoes.saida)
+    print(f'Resultados gravados em {opcoes.saida}')
+
+    if opcoes.salvar_baseline:
+        salvar_json(resultados, opcoes.baseline)
+        print(f'Baseline gravada em {opcoes.baseline}')
+        return 0
+    if not os.path.exists(opcoes.baseline):
+        print('Nenhuma baseline encontrada; use --salvar-baseline para criar uma.')
+        return 0
+    with open(opcoes.baseline, encoding='utf-8') as arquivo:
+        regressoes = comparar_com_baseline(resultados, json.load(arquivo), opcoes.tolerancia)
+    for regressao in regressoes:
+        print('REGRESSÃO:', regressao)
+    if not regressoes:
+        print('Nenhuma regressão em relação à baseline.')
+    return 1 if regressoes else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+import numpy as np
+import pandas as pd
+
+from fome_zero.dados import obter_estrutura, registrar_atualizacao
+from fome_zero.culinarias import construir_indice_culinarias, obter_indice_culinarias, tabela_culinarias
+from fome_zero.instrumentacao import cronometrar
+
+DIMENSOES_CUBO = ['country', 'city', 'price_category']
+COLUNAS_CUBO = DIMENSOES_CUBO + ['restaurant_id', 'votes', 'aggregate_rating', 'cost_for_two_usd']
+DIMENSOES_CUBO_CULINARIAS = ['country', 'city', 'cuisines']
+# Faixas de 0,1 ponto de aggregate_rating: a faixa k guarda as notas k / 10.
+LARGURA_FAIXA_NOTA = 0.1
+NUM_FAIXAS_NOTA = 51
+# Limiares padrão dos gráficos de cidades com notas altas e baixas.
+NOTA_ALTA_PADRAO = 4.0
+NOTA_BAIXA_PADRAO = 2.5
+
+# =========================
+# Módulo: Cubo de Agregados
+# =========================
+
+@cronometrar()
+def construir_cubo(df):
+    # Uma linha por combinação país × cidade × faixa de preço presente nos dados;
+    # cada restaurante entra em exatamente uma linha.
+    return (
+        df.groupby(DIMENSOES_CUBO, observed=True)
+        .agg(
+            restaurantes=('restaurant_id', 'size'),
+            restaurantes_distintos=('restaurant_id', 'nunique'),
+            soma_votos=('votes', 'sum'),
+            soma_notas=('aggregate_rating', 'sum'),
+            # Nem todo restaurante informa o custo; a média usa só os que informam.
+            restaurantes_com_custo=('cost_for_two_usd', 'count'),
+            soma_custo_usd=('cost_for_two_usd', 'sum'),
+        )
+        .reset_index()
+    )
+
+def obter_cubo():
+    return obter_estrutura('cubo', construir_cubo)
+
+@cronometrar()
+def construir_cubo_culinarias(df, indice=None):
+    # Uma linha por país × cidade × culinária, com o restaurante contado em cada
+    # uma das suas culinárias. Como a culinária é uma dimensão do cubo, a contagem
+    # de culinárias distintas de qualquer recorte é exata.
+    if indice is None:
+        indice = construir_indice_culinarias(df)
+    tabela = tabela_culinarias(df, indice, ['country', 'city', 'restaurant_id', 'votes', 'aggregate_rating', 'cost_for_two_usd'])
+    return (
+        tabela.groupby(DIMENSOES_CUBO_CULINARIAS, observed=True)
+        .agg(
+            restaurantes=('restaurant_id', 'size'),
+            soma_votos=('votes', 'sum'),
+            soma_notas=('aggregate_rating', 'sum'),
+            restaurantes_com_custo=('cost_for_two_usd', 'count'),
+            soma_custo_usd=('cost_for_two_usd', 'sum'),
+        )
+        .reset_index()
+    )
+
+def obter_cubo_culinarias():
+    return obter_estrutura('cubo_culinarias', lambda df: construir_cubo_culinarias(df, obter_indice_culinarias()))
+
+def filtrar_cubo(cubo, paises_selecionados):
+    return cubo[cubo['country'].isin(paises_selecionados)]
+
+# =========================
+# Módulo: Histograma de Notas por Cidade
+# =========================
+
+@cronometrar()
+def construir_histograma_notas(df):
+    # Uma linha por cidade × país; a coluna k conta os restaurantes da cidade
+    # com nota abaixo da faixa k (contagem acumulada), e a última coluna é o
+    # total com nota. Quantos restaurantes ficam acima ou abaixo de um limiar
+    # vira a leitura de uma ou duas colunas, sem percorrer as linhas. As linhas
+    # seguem a ordem do groupby por cidade e país, como nas consultas antigas.
+    notas = df['aggregate_rating'].to_numpy(dtype=float)
+    com_nota = ~np.isnan(notas)
+    faixas = np.clip(np.rint(notas[com_nota] / LARGURA_FAIXA_NOTA), 0, NUM_FAIXAS_NOTA - 1).astype(np.int64)
+    cidades, paises = df['city'].cat, df['country'].cat
+    num_paises = len(paises.categories)
+    # Código do par cidade × país: np.unique já o devolve na ordem do groupby.
+    pares = cidades.codes.to_numpy()[com_nota].astype(np.int64) * num_paises + paises.codes.to_numpy()[com_nota]
+    pares_presentes, par_linha = np.unique(pares, return_inverse=True)
+    contagens = np.bincount(
+        par_linha * NUM_FAIXAS_NOTA + faixas, minlength=len(pares_presentes) * NUM_FAIXAS_NOTA
+    ).reshape(len(pares_presentes), NUM_FAIXAS_NOTA)
+    acumulado = np.zeros((len(pares_presentes), NUM_FAIXAS_NOTA + 1), dtype=np.int64)
+    np.cumsum(contagens, axis=1, out=acumulado[:, 1:])
+    indice = pd.MultiIndex.from_arrays([
+        pd.Categorical.from_codes(pares_presentes // num_paises, cidades.categories),
+        pd.Categorical.from_codes(pares_presentes % num_paises, paises.categories),
+    ], names=['city', 'country'])
+    return pd.DataFrame(acumulado, index=indice)
+
+def obter_histograma_notas():
+    return obter_estrutura('histograma_notas', construir_histograma_notas)
+
+def filtrar_histograma(histograma, paises_selecionados):
+    return histograma[histograma.index.get_level_values('country').isin(paises_selecionados)]
+
+def faixa_do_limiar(nota):
+    # Arredonda antes de truncar: 0.3 / 0.1 dá 2.9999999999999996.
+    return round(nota / LARGURA_FAIXA_NOTA, 6)
+
+def restaurantes_nota_acima(histograma, nota):
+    # Restaurantes com nota > nota, por cidade; cidades sem nenhum ficam de fora.
+    faixa = int(np.clip(np.floor(faixa_do_limiar(nota)) + 1, 0, NUM_FAIXAS_NOTA))
+    contagens = histograma[NUM_FAIXAS_NOTA] - histograma[faixa]
+    return contagens[contagens > 0]
+
+def restaurantes_nota_abaixo(histograma, nota):
+    # Restaurantes com nota < nota, por cidade; cidades sem nenhum ficam de fora.
+    faixa = int(np.clip(np.ceil(faixa_do_limiar(nota)), 0, NUM_FAIXAS_NOTA))
+    contagens = histograma[faixa]
+    return contagens[contagens > 0]
+
+# =========================
+# Módulo: Consultas sobre o Cubo
+# =========================
+
+# culinarias_por_cidade e media_notas_por_culinaria esperam o cubo de culinárias.
+
+def media_por_restaurante(cubo, chaves, coluna_soma):
+    somas = cubo.groupby(chaves, observed=True)[[coluna_soma, 'restaurantes']].sum()
+    return somas[coluna_soma] / somas['restaurantes']
+
+def cidades_por_pais(cubo):
+    return cubo.groupby('country', observed=True)['city'].nunique()
+
+def restaurantes_por_pais(cubo):
+    return cubo.groupby('country', observed=True)['restaurantes_distintos'].sum()
+
+def media_votos_por_pais(cubo):
+    return media_por_restaurante(cubo, 'country', 'soma_votos')
+
+def media_notas_por_pais(cubo):
+    return media_por_restaurante(cubo, 'country', 'soma_notas')
+
+def restaurantes_por_cidade(cubo):
+    return cubo.groupby(['city', 'country'], observed=True)['restaurantes'].sum()
+
+def culinarias_por_cidade(cubo):
+    return cubo.groupby(['city', 'country'], observed=True)['cuisines'].nunique()
+
+def media_notas_por_culinaria(cubo):
+    return media_por_restaurante(cubo, 'cuisines', 'soma_notas')
+
+def media_custo(cubo, chaves):
+    # Custo médio para dois, em dólares, entre os restaurantes que informam o custo.
+    somas = cubo.groupby(chaves, observed=True)[['soma_custo_usd', 'restaurantes_com_custo']].sum()
+    somas = somas[somas['restaurantes_com_custo'] > 0]
+    return somas['soma_custo_usd'] / somas['restaurantes_com_custo']
+
+def media_custo_por_pais(cubo):
+    return media_custo(cubo, 'country')
+
+def media_custo_por_cidade(cubo):
+    return media_custo(cubo, ['city', 'country'])
+
+def media_custo_por_culinaria(cubo):
+    return media_custo(cubo, 'cuisines')
+
+# =========================
+# Módulo: Atualização por Deltas
+# =========================
+
+def somar_cubos(partes, dimensoes, categorias):
+    # Soma cubos parciais (contribuições negativas incluídas) célula a célula,
+    # com as categorias do dataset atualizado; células zeradas saem do cubo.
+    cubo = pd.concat(partes, ignore_index=True)
+    for dimensao in dimensoes:
+        cubo[dimensao] = pd.Categorical(cubo[dimensao].astype(object), categories=categorias[dimensao])
+    cubo = cubo.groupby(dimensoes, observed=True).sum().reset_index()
+    return cubo[cubo['restaurantes'] > 0].reset_index(drop=True)
+
+def negativo(cubo, dimensoes):
+    cubo = cubo.copy()
+    medidas = [coluna for coluna in cubo.columns if coluna not in dimensoes]
+    cubo[medidas] = -cubo[medidas]
+    return cubo
+
+def atualizar_cubo(cubo, removidas, inseridas, df_novo):
+    categorias = {dimensao: df_novo[dimensao].cat.categories for dimensao in DIMENSOES_CUBO}
+    partes = [cubo, negativo(construir_cubo(removidas), DIMENSOES_CUBO), construir_cubo(inseridas)]
+    return somar_cubos(partes, DIMENSOES_CUBO, categorias)
+
+def atualizar_cubo_culinarias(cubo, removidas, inseridas, df_novo):
+    # As linhas do delta só usam algumas combinações de all_cuisines; o índice
+    # delas é montado só sobre essas. As culinárias do cubo completo nunca
+    # diminuem (as categorias de all_cuisines só crescem com os deltas).
+    removidas, inseridas = [
+        parte.assign(all_cuisines=parte['all_cuisines'].cat.remove_unused_categories())
+        for parte in (removidas, inseridas)
+    ]
+    novas = [construir_cubo_culinarias(inseridas)]
+    categorias = {
+        'country': df_novo['country'].cat.categories,
+        'city': df_novo['city'].cat.categories,
+        'cuisines': cubo['cuisines'].cat.categories.union(novas[0]['cuisines'].cat.categories),
+    }
+    partes = [cubo, negativo(construir_cubo_culinarias(removidas), DIMENSOES_CUBO_CULINARIAS)] + novas
+    return somar_cubos(partes, DIMENSOES_CUBO_CULINARIAS, categorias)
+
+registrar_atualizacao('cubo', atualizar_cubo)
+registrar_atualizacao('cubo_culinarias', atualizar_cubo_culinarias)
+
+def atualizar_histograma_notas(histograma, removidas, inseridas, df_novo):
+    # As contagens acumuladas também são somáveis: o histograma das linhas
+    # removidas sai e o das inseridas entra, cidade a cidade.
+    partes = [histograma, -construir_histograma_notas(removidas), construir_histograma_notas(inseridas)]
+    somado = pd.concat(partes).reset_index()
+    for dimensao in ('city', 'country'):
+        somado[dimensao] = pd.Categorical(somado[dimensao].astype(object), categories=df_novo[dimensao].cat.categories)
+    somado = somado.groupby(['city', 'country'], observed=True).sum()
+    somado.columns = histograma.columns
+    return somado[somado[NUM_FAIXAS_NOTA] > 0]
+
+registrar_atualizacao('histograma_notas', atualizar_histograma_notas)
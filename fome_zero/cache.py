@@ -0,0 +1,64 @@
+import sys
+import threading
+from collections import OrderedDict
+
+# =========================
+# Módulo: Cache LRU limitado por memória
+# =========================
+
+class CacheLRU:
+    """Cache LRU compartilhado entre sessões, com despejo pelo tamanho total em bytes."""
+
+    def __init__(self, limite_bytes, medir_tamanho=sys.getsizeof):
+        self.limite_bytes = limite_bytes
+        self.medir_tamanho = medir_tamanho
+        self.itens = OrderedDict()
+        self.bytes_usados = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.trava = threading.Lock()
+
+    def obter(self, chave, construir):
+        with self.trava:
+            if chave in self.itens:
+                self.itens.move_to_end(chave)
+                self.acertos += 1
+                return self.itens[chave][0]
+            self.falhas += 1
+        valor = construir()
+        self.guardar(chave, valor)
+        return valor
+
+    def __contains__(self, chave):
+        with self.trava:
+            return chave in self.itens
+
+    def guardar(self, chave, valor):
+        tamanho = self.medir_tamanho(valor)
+        with self.trava:
+            if chave in self.itens:
+                self.bytes_usados -= self.itens.pop(chave)[1]
+            # Um item maior que o limite inteiro não é guardado.
+            if tamanho > self.limite_bytes:
+                return
+            self.itens[chave] = (valor, tamanho)
+            self.bytes_usados += tamanho
+            while self.bytes_usados > self.limite_bytes:
+                _, (_, tamanho_removido) = self.itens.popitem(last=False)
+                self.bytes_usados -= tamanho_removido
+
+    def limpar(self):
+        with self.trava:
+            self.itens.clear()
+            self.bytes_usados = 0
+
+    def estatisticas(self):
+        with self.trava:
+            consultas = self.acertos + self.falhas
+            return {
+                'itens': len(self.itens),
+                'bytes': self.bytes_usados,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+            }
@@ -0,0 +1,229 @@
+import json
+
+import numpy as np
+
+from fome_zero.cache import CacheLRU
+from fome_zero.dados import carregar_dataset, dataset_fixo, versao_dataset
+from fome_zero.agregados import (
+    obter_cubo, obter_cubo_culinarias, filtrar_cubo, cidades_por_pais, media_notas_por_culinaria,
+    media_custo_por_pais, media_custo_por_cidade, media_custo_por_culinaria, obter_histograma_notas, filtrar_histograma, restaurantes_nota_acima, restaurantes_nota_abaixo,
+    NOTA_ALTA_PADRAO, NOTA_BAIXA_PADRAO
+)
+from fome_zero.culinarias import contar_culinarias, obter_indice_culinarias
+from fome_zero.filtros import obter_indice_filtros, filtrar
+from fome_zero.ranking import obter_ranking, obter_ranking_culinaria, filtrar_ranking, top_k
+from fome_zero.instrumentacao import cronometrar, registrar_cache
+
+# =========================
+# Módulo: Métricas Gerais
+# =========================
+
+@cronometrar()
+def calcular_metricas(df_filtrado):
+    num_restaurantes = df_filtrado['restaurant_id'].nunique() if 'restaurant_id' in df_filtrado.columns else df_filtrado.shape[0]
+    num_paises = df_filtrado['country_code'].nunique() if 'country_code' in df_filtrado.columns else 0
+    num_cidades = df_filtrado['city'].nunique() if 'city' in df_filtrado.columns else 0
+    num_avaliacoes = df_filtrado['votes'].sum() if 'votes' in df_filtrado.columns else 0
+    if 'all_cuisines' in df_filtrado.columns:
+        tipos_culinaria = contar_culinarias(df_filtrado['all_cuisines'])
+    else:
+        tipos_culinaria = df_filtrado['cuisines'].nunique() if 'cuisines' in df_filtrado.columns else 0
+    return num_restaurantes, num_paises, num_cidades, num_avaliacoes, tipos_culinaria
+
+# =========================
+# Módulo: Consultas sem Interface
+# =========================
+
+# Os mesmos números das páginas, em estruturas simples (listas e dicts) para
+# clientes sem Streamlit. Todos partem das estruturas compartilhadas do dataset
+# (cubos, rankings, índices), então não repetem o trabalho feito pelas páginas.
+
+COLUNAS_RESTAURANTES = ['restaurant_id', 'restaurant_name', 'city', 'country', 'cuisines', 'all_cuisines', 'aggregate_rating', 'votes']
+LIMITE_PADRAO = 10
+LIMITE_BYTES_CACHE_RESPOSTAS = 16 * 1024 * 1024
+
+def consultar_metricas(paises=None, precos=None):
+    selecoes = {}
+    if paises is not None:
+        selecoes['country'] = paises
+    if precos is not None:
+        selecoes['price_category'] = precos
+    df_filtrado = filtrar(carregar_dataset(), obter_indice_filtros(), selecoes)
+    num_restaurantes, num_paises, num_cidades, num_avaliacoes, tipos_culinaria = calcular_metricas(df_filtrado)
+    return {
+        'restaurantes': int(num_restaurantes),
+        'paises': int(num_paises),
+        'cidades': int(num_cidades),
+        'avaliacoes': int(num_avaliacoes),
+        'tipos_culinaria': int(tipos_culinaria),
+    }
+
+def recortar_cubo(cubo, paises):
+    return cubo if paises is None else filtrar_cubo(cubo, paises)
+
+def consultar_cidades_por_pais(paises=None, limite=None):
+    cidades = cidades_por_pais(recortar_cubo(obter_cubo(), paises)).sort_values(ascending=False)
+    if limite is not None:
+        cidades = cidades.head(limite)
+    return [{'pais': pais, 'cidades': int(quantidade)} for pais, quantidade in cidades.items()]
+
+def consultar_culinarias(paises=None, limite=LIMITE_PADRAO, piores=False):
+    medias = media_notas_por_culinaria(recortar_cubo(obter_cubo_culinarias(), paises))
+    medias = medias.sort_values(ascending=piores).head(limite)
+    return [{'culinaria': culinaria, 'nota_media': round(float(nota), 4)} for culinaria, nota in medias.items()]
+
+def consultar_custo_por_pais(paises=None, limite=None):
+    custos = media_custo_por_pais(recortar_cubo(obter_cubo(), paises)).sort_values(ascending=False)
+    if limite is not None:
+        custos = custos.head(limite)
+    return [{'pais': pais, 'custo_para_dois_usd': round(float(custo), 2)} for pais, custo in custos.items()]
+
+def consultar_custo_por_cidade(paises=None, limite=LIMITE_PADRAO):
+    custos = media_custo_por_cidade(recortar_cubo(obter_cubo(), paises)).sort_values(ascending=False).head(limite)
+    return [
+        {'cidade': cidade, 'pais': pais, 'custo_para_dois_usd': round(float(custo), 2)}
+        for (cidade, pais), custo in custos.items()
+    ]
+
+def consultar_custo_por_culinaria(paises=None, limite=LIMITE_PADRAO):
+    # Cada restaurante entra no custo de todas as culinárias que serve.
+    custos = media_custo_por_culinaria(recortar_cubo(obter_cubo_culinarias(), paises))
+    custos = custos.sort_values(ascending=False).head(limite)
+    return [{'culinaria': culinaria, 'custo_para_dois_usd': round(float(custo), 2)} for culinaria, custo in custos.items()]
+
+def consultar_cidades_por_nota(nota=None, paises=None, limite=LIMITE_PADRAO, abaixo=False):
+    # Sem nota, valem os limiares padrão da página de cidades.
+    if nota is None:
+        nota = NOTA_BAIXA_PADRAO if abaixo else NOTA_ALTA_PADRAO
+    histograma = obter_histograma_notas()
+    if paises is not None:
+        histograma = filtrar_histograma(histograma, paises)
+    contar = restaurantes_nota_abaixo if abaixo else restaurantes_nota_acima
+    cidades = contar(histograma, nota).sort_values(ascending=False).head(limite)
+    return [
+        {'cidade': cidade, 'pais': pais, 'restaurantes': int(quantidade)}
+        for (cidade, pais), quantidade in cidades.items()
+    ]
+
+def consultar_restaurantes(paises=None, limite=LIMITE_PADRAO, culinaria=None):
+    # Só culinárias existentes: cada uma guarda o seu ranking no cache do dataset.
+    if culinaria is not None and culinaria.strip().lower() not in obter_indice_culinarias()['nomes_normalizados']:
+        raise ConsultaInvalida(f"Culinária desconhecida: {culinaria!r}.")
+    ranking = obter_ranking() if culinaria is None else obter_ranking_culinaria(culinaria)
+    if paises is not None:
+        ranking = filtrar_ranking(ranking, paises)
+    top = top_k(ranking, limite)[COLUNAS_RESTAURANTES]
+    return [
+        {coluna: valor.item() if isinstance(valor, np.generic) else valor for coluna, valor in registro.items()}
+        for registro in top.to_dict('records')
+    ]
+
+# Nome da consulta -> (função, parâmetros aceitos).
+CONSULTAS = {
+    'metricas': (consultar_metricas, ('paises', 'precos')),
+    'cidades_por_pais': (consultar_cidades_por_pais, ('paises', 'limite')),
+    'melhores_culinarias': (consultar_culinarias, ('paises', 'limite')),
+    'piores_culinarias': (lambda **parametros: consultar_culinarias(piores=True, **parametros), ('paises', 'limite')),
+    'top_restaurantes': (consultar_restaurantes, ('paises', 'limite', 'culinaria')),
+    'custo_por_pais': (consultar_custo_por_pais, ('paises', 'limite')),
+    'custo_por_cidade': (consultar_custo_por_cidade, ('paises', 'limite')),
+    'custo_por_culinaria': (consultar_custo_por_culinaria, ('paises', 'limite')),
+    'cidades_nota_acima': (consultar_cidades_por_nota, ('nota', 'paises', 'limite')),
+    'cidades_nota_abaixo': (
+        lambda **parametros: consultar_cidades_por_nota(abaixo=True, **parametros), ('nota', 'paises', 'limite')
+    ),
+}
+
+# =========================
+# Módulo: Pedidos e Cache de Respostas
+# =========================
+
+class ConsultaInvalida(ValueError):
+    pass
+
+def normalizar_lista(valor):
+    # Aceita 'India', ['India', 'Brazil'] ou 'India,Brazil' (como vem da URL).
+    if isinstance(valor, str):
+        valor = valor.split(',')
+    if not isinstance(valor, (list, tuple)) or not all(isinstance(item, str) for item in valor):
+        raise ConsultaInvalida("Esperada uma lista de textos.")
+    return tuple(sorted({item.strip() for item in valor if item.strip()}))
+
+def normalizar_limite(valor):
+    try:
+        limite = int(valor)
+    except (TypeError, ValueError):
+        raise ConsultaInvalida("limite deve ser um número inteiro.") from None
+    if limite < 1:
+        raise ConsultaInvalida("limite deve ser maior que zero.")
+    return limite
+
+def normalizar_nota(valor):
+    try:
+        nota = float(valor)
+    except (TypeError, ValueError):
+        raise ConsultaInvalida("nota deve ser um número.") from None
+    if not 0 <= nota <= 5:
+        raise ConsultaInvalida("nota deve estar entre 0 e 5.")
+    return nota
+
+def normalizar_culinaria(valor):
+    if not isinstance(valor, str) or not valor.strip():
+        raise ConsultaInvalida("culinaria deve ser um texto.")
+    return valor.strip().lower()
+
+NORMALIZADORES = {
+    'paises': normalizar_lista,
+    'precos': normalizar_lista,
+    'limite': normalizar_limite,
+    'culinaria': normalizar_culinaria,
+    'nota': normalizar_nota,
+}
+
+def normalizar_pedido(pedido):
+    # pedido: {'consulta': nome, 'parametros': {...}} -> (nome, parâmetros em
+    # forma canônica, ordenados), usado também como chave do cache.
+    if not isinstance(pedido, dict) or 'consulta' not in pedido:
+        raise ConsultaInvalida("Pedido sem o campo 'consulta'.")
+    nome = pedido['consulta']
+    if nome not in CONSULTAS:
+        raise ConsultaInvalida(f"Consulta desconhecida: {nome!r}. Use uma de {sorted(CONSULTAS)}.")
+    parametros = pedido.get('parametros') or {}
+    if not isinstance(parametros, dict):
+        raise ConsultaInvalida("'parametros' deve ser um objeto.")
+    aceitos = CONSULTAS[nome][1]
+    desconhecidos = set(parametros) - set(aceitos)
+    if desconhecidos:
+        raise ConsultaInvalida(f"Parâmetros não aceitos por {nome}: {sorted(desconhecidos)}.")
+    return nome, tuple(sorted(
+        (chave, NORMALIZADORES[chave](valor)) for chave, valor in parametros.items() if valor is not None
+    ))
+
+_cache_respostas = CacheLRU(LIMITE_BYTES_CACHE_RESPOSTAS, medir_tamanho=len)
+registrar_cache('respostas', _cache_respostas.estatisticas)
+
+@cronometrar()
+def responder(pedido):
+    # Resposta já serializada em JSON (bytes); pedidos equivalentes, com os
+    # parâmetros em qualquer ordem, compartilham a mesma entrada do cache.
+    # O pedido inteiro (chave e cálculo) usa um só estado do dataset.
+    nome, parametros = normalizar_pedido(pedido)
+    funcao = CONSULTAS[nome][0]
+    with dataset_fixo():
+        return _cache_respostas.obter(
+            (versao_dataset(), nome, parametros),
+            lambda: json.dumps(funcao(**dict(parametros)), ensure_ascii=False).encode('utf-8')
+        )
+
+def responder_lote(pedidos):
+    # Um pedido inválido não derruba o lote: a posição dele recebe {"erro": ...}.
+    respostas = []
+    for pedido in pedidos:
+        try:
+            respostas.append(responder(pedido))
+        except ConsultaInvalida as erro:
+            respostas.append(json.dumps({'erro': str(erro)}, ensure_ascii=False).encode('utf-8'))
+    return b'[' + b','.join(respostas) + b']'
+
+def estatisticas_cache_respostas():
+    return _cache_respostas.estatisticas()
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from fome_zero.dados import obter_estrutura
+from fome_zero.instrumentacao import cronometrar
+
+# =========================
+# Módulo: Índice de Culinárias
+# =========================
+
+def separar_culinarias(texto):
+    # "Italian, Pizza, Italian" -> ['Italian', 'Pizza'], na ordem original.
+    return list(dict.fromkeys(parte.strip() for parte in texto.split(',') if parte.strip()))
+
+@cronometrar()
+def construir_indice_culinarias(df):
+    # Relação restaurante -> culinária em formato longo (uma entrada por par),
+    # com as culinárias em códigos categóricos. O texto é separado só nas
+    # combinações distintas de all_cuisines e projetado nas linhas pelos códigos.
+    serie = df['all_cuisines']
+    listas = [separar_culinarias(combinacao) for combinacao in serie.cat.categories]
+    nomes = pd.Index(sorted({nome for lista in listas for nome in lista}))
+    codigo_por_nome = {nome: codigo for codigo, nome in enumerate(nomes)}
+    tamanhos = np.array([len(lista) for lista in listas], dtype=np.intp)
+    inicios = (np.cumsum(tamanhos) - tamanhos).astype(np.intp)
+    planos = np.fromiter(
+        (codigo_por_nome[nome] for lista in listas for nome in lista), dtype=np.intp, count=int(tamanhos.sum())
+    )
+
+    combinacao_linha = serie.cat.codes.to_numpy()
+    quantidade = np.where(combinacao_linha >= 0, tamanhos[combinacao_linha], 0)
+    linhas = np.repeat(np.arange(len(df)), quantidade)
+    # Posição de cada entrada dentro da lista do seu restaurante.
+    deslocamento = np.arange(len(linhas)) - np.repeat(np.cumsum(quantidade) - quantidade, quantidade)
+    culinarias = planos[inicios[combinacao_linha[linhas]] + deslocamento]
+
+    # Ordenação estável por culinária: as posições de cada uma ficam contíguas e crescentes.
+    ordem = np.argsort(culinarias, kind='stable')
+    limites = np.cumsum(np.bincount(culinarias, minlength=len(nomes)))[:-1]
+    grupos = np.split(linhas[ordem], limites)
+    return {
+        'nomes': nomes,
+        'linhas': linhas,
+        'culinarias': culinarias,
+        'por_culinaria': {nome: posicoes for nome, posicoes in zip(nomes, grupos) if len(posicoes)},
+        'nomes_normalizados': {nome.lower(): nome for nome in nomes},
+    }
+
+def obter_indice_culinarias():
+    return obter_estrutura('indice_culinarias', construir_indice_culinarias)
+
+# =========================
+# Módulo: Consultas por Culinária
+# =========================
+
+def posicoes_culinaria(indice, culinaria):
+    # Busca exata, sem diferenciar maiúsculas: 'italian' encontra 'Italian'.
+    nome = indice['nomes_normalizados'].get(culinaria.strip().lower())
+    if nome is None:
+        return np.empty(0, dtype=np.intp)
+    return indice['por_culinaria'][nome]
+
+def mascara_culinaria(indice, culinaria, num_linhas):
+    mascara = np.zeros(num_linhas, dtype=bool)
+    mascara[posicoes_culinaria(indice, culinaria)] = True
+    return mascara
+
+def tabela_culinarias(df, indice, colunas):
+    # Tabela longa: as colunas pedidas de cada restaurante repetidas para cada
+    # uma das suas culinárias, na coluna 'cuisines'.
+    tabela = pd.DataFrame({coluna: df[coluna].take(indice['linhas']).reset_index(drop=True) for coluna in colunas})
+    tabela['cuisines'] = pd.Categorical.from_codes(indice['culinarias'], indice['nomes'])
+    return tabela
+
+def contar_culinarias(serie_combinacoes):
+    # Culinárias distintas entre os restaurantes de uma seleção, a partir das
+    # combinações de all_cuisines presentes nela.
+    combinacoes = pd.unique(serie_combinacoes.dropna())
+    return len({nome for combinacao in combinacoes for nome in separar_culinarias(combinacao)})
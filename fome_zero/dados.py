@@ -0,0 +1,811 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import inflection
+
+from fome_zero import snapshot
+from fome_zero.instrumentacao import contexto_execucao, cronometrar, executar_no_contexto, medir_etapa, registrar_cache
+
+CAMINHO_PADRAO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'zomato.csv')
+
+# 'primeiro' mantém a primeira ocorrência de cada Restaurant ID, 'ultimo' a mais
+# recente (última linha do arquivo) e 'falhar' aceita apenas cópias idênticas.
+POLITICA_DUPLICADOS_PADRAO = 'primeiro'
+POLITICAS_DUPLICADOS = {'primeiro': 'first', 'ultimo': 'last', 'falhar': 'first'}
+# Política usada ao carregar o dataset do painel e da API. Ela é gravada nos
+# metadados dos snapshots, que só são reaproveitados com a mesma política.
+VARIAVEL_POLITICA_DUPLICADOS = 'FOME_ZERO_POLITICA_DUPLICADOS'
+
+# Tipos do CSV bruto, fixados para que leituras inteiras e em blocos produzam as mesmas colunas.
+TIPOS_COLUNAS_CSV = {
+    'Restaurant ID': 'int64',
+    'Restaurant Name': 'object',
+    'Country Code': 'int64',
+    'City': 'object',
+    'Address': 'object',
+    'Locality': 'object',
+    'Locality Verbose': 'object',
+    'Longitude': 'float64',
+    'Latitude': 'float64',
+    'Cuisines': 'object',
+    'Average Cost for two': 'int64',
+    'Currency': 'object',
+    'Has Table booking': 'int64',
+    'Has Online delivery': 'int64',
+    'Is delivering now': 'int64',
+    'Switch to order menu': 'int64',
+    'Price range': 'int64',
+    'Aggregate rating': 'float64',
+    'Rating color': 'object',
+    'Rating text': 'object',
+    'Votes': 'int64',
+}
+
+# Colunas que as páginas e as estruturas derivadas realmente leem; o dataset
+# compartilhado carrega só estas, e endereço, localidade etc. nem chegam a ser lidos.
+COLUNAS_PAINEL = [
+    'restaurant_id', 'restaurant_name', 'country_code', 'country', 'city', 'cuisines',
+    'all_cuisines', 'price_category', 'aggregate_rating', 'rating_color', 'votes', 'latitude', 'longitude',
+    'cost_for_two_usd',
+]
+
+# Colunas derivadas e a coluna bruta de onde cada uma sai.
+ORIGEM_COLUNAS_DERIVADAS = {
+    'country': 'Country Code',
+    'rating_color_name': 'Rating color',
+    'price_category': 'Price range',
+    'all_cuisines': 'Cuisines',
+    'currency_code': 'Country Code',
+    'cost_for_two_usd': ('Average Cost for two', 'Country Code'),
+}
+# Sempre lidas: a deduplicação usa o ID e o pipeline descarta linhas sem culinária.
+COLUNAS_BRUTAS_OBRIGATORIAS = ['Restaurant ID', 'Cuisines']
+
+# Com FOME_ZERO_DATASET_COMPARTILHADO=1 o dataset tratado é lido de um arquivo
+# Arrow mapeado em memória, compartilhado por todos os processos da máquina.
+VARIAVEL_DATASET_COMPARTILHADO = 'FOME_ZERO_DATASET_COMPARTILHADO'
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Módulo: Carregamento e Tratamento de Dados
+# =========================
+
+def nome_coluna(coluna):
+    return inflection.underscore(inflection.titleize(coluna).replace(" ", ""))
+
+MAPA_COLUNAS = {
+    coluna: nome_coluna(coluna)
+    for coluna in [*TIPOS_COLUNAS_CSV, 'Country', 'Rating color name', 'Price Category', 'All Cuisines', 'Currency Code', 'Cost For Two Usd']
+}
+
+def colunas_brutas(colunas):
+    if colunas is None:
+        return None
+    nomes_brutos = {nome: coluna for coluna, nome in MAPA_COLUNAS.items()}
+    necessarias = set(COLUNAS_BRUTAS_OBRIGATORIAS)
+    for coluna in colunas:
+        origem = ORIGEM_COLUNAS_DERIVADAS.get(coluna) or nomes_brutos.get(coluna)
+        if origem is None:
+            raise ValueError(f"Coluna desconhecida: {coluna!r}")
+        necessarias.update(origem if isinstance(origem, tuple) else (origem,))
+    return [coluna for coluna in TIPOS_COLUNAS_CSV if coluna in necessarias]
+
+@cronometrar()
+def carregar_dados(caminho_arquivo, colunas=None):
+    return pd.read_csv(caminho_arquivo, usecols=colunas_brutas(colunas), dtype=TIPOS_COLUNAS_CSV)
+
+def validar_politica_duplicados(politica):
+    if politica not in POLITICAS_DUPLICADOS:
+        raise ValueError(f"Política de duplicados desconhecida: {politica!r}")
+    return politica
+
+def politica_duplicados_configurada():
+    return validar_politica_duplicados(
+        os.environ.get(VARIAVEL_POLITICA_DUPLICADOS, '') or POLITICA_DUPLICADOS_PADRAO
+    )
+
+@cronometrar()
+def remover_duplicados(df, politica=POLITICA_DUPLICADOS_PADRAO):
+    validar_politica_duplicados(politica)
+    duplicados = df['Restaurant ID'].duplicated(keep=POLITICAS_DUPLICADOS[politica])
+    num_duplicados = int(duplicados.sum())
+    if politica == 'falhar' and num_duplicados:
+        repetidos = df[df['Restaurant ID'].duplicated(keep=False)]
+        conflitantes = repetidos.drop_duplicates()['Restaurant ID'].duplicated()
+        if conflitantes.any():
+            raise ValueError(
+                f"{int(conflitantes.sum())} restaurantes com registros duplicados conflitantes: "
+                f"{sorted(repetidos.drop_duplicates()['Restaurant ID'][conflitantes].unique())[:10]}"
+            )
+    if not num_duplicados:
+        return df
+    # Linhas descartadas mudam contagens e médias do painel; ficam visíveis no log.
+    logger.warning("%d linhas duplicadas removidas (política '%s')", num_duplicados, politica)
+    return df[~duplicados].reset_index(drop=True)
+
+def converter_categorias(serie, transformacao):
+    # Aplica a transformação (dict ou função) só aos valores distintos e remonta a
+    # coluna pelos códigos, devolvendo dtype category com categorias ordenadas.
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    transformados = pd.Index(unicos).map(transformacao)
+    categorias = pd.Index(transformados.dropna().unique()).sort_values()
+    novos_codigos = categorias.get_indexer(transformados)
+    return pd.Categorical.from_codes(novos_codigos[codigos], categorias)
+
+@cronometrar()
+def mapear_rating_text(df):
+    if 'Rating text' not in df.columns:
+        return df
+    mapeamento_rating = {
+        'Excellent': 'Excellent',
+        'Very Good': 'Very Good',
+        'Good': 'Good',
+        'Average': 'Average',
+        'Not rated': 'Not rated',
+        'Poor': 'Poor',
+        'Excelente': 'Excellent',
+        'Muito bom': 'Very Good',
+        'Muito Bom': 'Very Good',
+        'Bardzo dobrze': 'Very Good',
+        'Muy Bueno': 'Very Good',
+        'Bueno': 'Good',
+        'Baik': 'Good',
+        'Biasa': 'Average',
+        'Skvělá volba': 'Excellent',
+        'Velmi dobré': 'Very Good',
+        'Harika': 'Excellent',
+        'Çok iyi': 'Very Good',
+        'Eccellente': 'Excellent',
+        'Veľmi dobré': 'Very Good',
+        'Buono': 'Good',
+        'Bom': 'Good',
+        'Skvělé': 'Excellent',
+        'Wybitnie': 'Excellent',
+        'Sangat Baik': 'Very Good',
+        'Terbaik': 'Excellent',
+        'İyi': 'Good',
+        'Vynikajúce': 'Excellent'
+    }
+    df['Rating text'] = converter_categorias(df['Rating text'], lambda texto: mapeamento_rating.get(texto, texto))
+    return df
+
+@cronometrar()
+def mapear_country_code(df):
+    if 'Country Code' not in df.columns:
+        return df
+    country_code_to_name = {
+        1: 'India',
+        14: 'Australia',
+        30: 'Brazil',
+        37: 'Canada',
+        94: 'Indonesia',
+        148: 'New Zealand',
+        162: 'Philippines',
+        166: 'Qatar',
+        184: 'Singapore',
+        189: 'South Africa',
+        191: 'Sri Lanka',
+        208: 'Turkey',
+        214: 'UAE',
+        215: 'England',
+        216: 'United States'
+    }
+    df['Country'] = converter_categorias(df['Country Code'], country_code_to_name)
+    return df
+
+@cronometrar()
+def mapear_rating_color(df):
+    if 'Rating color' not in df.columns:
+        return df
+    rating_color = {
+        "3F7E00": "darkgreen",
+        "5BA829": "green",
+        "9ACD32": "lightgreen",
+        "CDD614": "orange",
+        "FFBA00": "red",
+        "CBCBC8": "darkred",
+        "FF7800": "darkred",
+    }
+    df['Rating color name'] = converter_categorias(df['Rating color'], rating_color)
+    return df
+
+@cronometrar()
+def categorizar_preco(df):
+    if 'Price range' not in df.columns:
+        return df
+    categorias_preco = {1: "cheap", 2: "normal", 3: "expensive"}
+    df['Price Category'] = converter_categorias(df['Price range'], lambda faixa: categorias_preco.get(faixa, "gourmet"))
+    return df
+
+# A coluna Currency traz rótulos inconsistentes (as linhas das Filipinas dizem
+# "Botswana Pula(P)") e fica como veio; o código da moeda (currency_code) e a
+# conversão saem do código do país. Taxas de referência fixas, em dólares por
+# unidade da moeda local, da época da coleta dos dados (2018–2019); custos
+# zerados ou acima de LIMITE_CUSTO_USD (erros de digitação, como os 25000017
+# dólares australianos) ficam sem valor.
+MOEDA_POR_PAIS = {
+    1: 'INR', 14: 'AUD', 30: 'BRL', 37: 'CAD', 94: 'IDR', 148: 'NZD', 162: 'PHP', 166: 'QAR',
+    184: 'SGD', 189: 'ZAR', 191: 'LKR', 208: 'TRY', 214: 'AED', 215: 'GBP', 216: 'USD',
+}
+USD_POR_MOEDA = {
+    'INR': 0.014, 'AUD': 0.70, 'BRL': 0.26, 'CAD': 0.75, 'IDR': 0.00007, 'NZD': 0.66, 'PHP': 0.019,
+    'QAR': 0.2747, 'SGD': 0.73, 'ZAR': 0.07, 'LKR': 0.0056, 'TRY': 0.18, 'AED': 0.2723, 'GBP': 1.28, 'USD': 1.0,
+}
+LIMITE_CUSTO_USD = 5000.0
+# Taxa indexada pelo código do país, para a conversão ser uma única indexação do NumPy.
+TAXAS_POR_CODIGO_PAIS = np.full(max(MOEDA_POR_PAIS) + 1, np.nan)
+for codigo_pais, moeda in MOEDA_POR_PAIS.items():
+    TAXAS_POR_CODIGO_PAIS[codigo_pais] = USD_POR_MOEDA[moeda]
+
+@cronometrar()
+def normalizar_moedas(df):
+    if 'Country Code' not in df.columns:
+        return df
+    # Currency continua com o rótulo original; o código ISO vai para uma coluna própria.
+    codigos = df['Country Code'].to_numpy()
+    df['Currency Code'] = converter_categorias(df['Country Code'], MOEDA_POR_PAIS)
+    if 'Average Cost for two' in df.columns:
+        conhecidos = (codigos >= 0) & (codigos < len(TAXAS_POR_CODIGO_PAIS))
+        taxas = np.where(conhecidos, TAXAS_POR_CODIGO_PAIS[np.where(conhecidos, codigos, 0)], np.nan)
+        custo = df['Average Cost for two'].to_numpy() * taxas
+        custo[(custo <= 0) | (custo > LIMITE_CUSTO_USD)] = np.nan
+        df['Cost For Two Usd'] = custo
+    return df
+
+@cronometrar()
+def renomear_colunas(df):
+    # Troca só os rótulos das colunas, sem copiar os dados.
+    df.columns = [MAPA_COLUNAS.get(coluna) or nome_coluna(coluna) for coluna in df.columns]
+    return df
+
+@cronometrar()
+def guardar_todas_culinarias(df):
+    # A lista completa ("Italian, Pizza") fica em all_cuisines para o índice de
+    # culinárias (fome_zero.culinarias); cuisines passa a ter só a principal.
+    df['all_cuisines'] = converter_categorias(df['cuisines'], lambda x: x)
+    return df
+
+@cronometrar()
+def extrair_primeira_culinaria(df):
+    df["cuisines"] = converter_categorias(df["cuisines"], lambda x: x.split(",")[0] if isinstance(x, str) else x)
+    return df
+
+@cronometrar()
+def categorizar_cidades(df):
+    if 'city' not in df.columns:
+        return df
+    df['city'] = df['city'].astype('category')
+    return df
+
+@cronometrar()
+def remover_na_culinarias(df):
+    sem_culinaria = df['cuisines'].isna()
+    if not sem_culinaria.any():
+        return df
+    return df[~sem_culinaria].reset_index(drop=True)
+
+def tratar_dados(df):
+    # Etapas que dependem apenas de cada linha; valem para o arquivo inteiro ou para um bloco.
+    df = mapear_rating_text(df)
+    df = mapear_country_code(df)
+    df = mapear_rating_color(df)
+    df = categorizar_preco(df)
+    df = normalizar_moedas(df)
+    df1 = renomear_colunas(df)
+    df1 = guardar_todas_culinarias(df1)
+    df1 = extrair_primeira_culinaria(df1)
+    df1 = categorizar_cidades(df1)
+    df1 = remover_na_culinarias(df1)
+    return df1
+
+@cronometrar()
+def projetar_colunas(df, colunas):
+    # Descarta, no próprio DataFrame, as colunas lidas só para derivar ou
+    # deduplicar e que não foram pedidas.
+    if colunas is not None:
+        for coluna in [coluna for coluna in df.columns if coluna not in colunas]:
+            del df[coluna]
+    return df
+
+@cronometrar()
+def pipeline_dados(caminho_arquivo, politica_duplicados=None, colunas=None):
+    # Sem política explícita vale a configurada (FOME_ZERO_POLITICA_DUPLICADOS).
+    # 'falhar' compara as cópias em todas as colunas do CSV, então lê o arquivo
+    # inteiro mesmo quando só uma projeção foi pedida.
+    politica_duplicados = politica_duplicados or politica_duplicados_configurada()
+    df = carregar_dados(caminho_arquivo, None if politica_duplicados == 'falhar' else colunas)
+    df = remover_duplicados(df, politica_duplicados)
+    return projetar_colunas(tratar_dados(df), colunas)
+
+@cronometrar()
+def carregar_dados_tratados(caminho_arquivo, colunas=None, politica_duplicados=None):
+    # Lê o snapshot colunar quando ele corresponde ao CSV atual, à política de
+    # duplicados e tem as colunas pedidas; caso contrário roda o pipeline e tenta
+    # regravar o snapshot para as próximas réplicas.
+    politica_duplicados = politica_duplicados or politica_duplicados_configurada()
+    caminho_parquet = snapshot.caminho_snapshot(caminho_arquivo)
+    df = snapshot.ler_snapshot(caminho_parquet, caminho_arquivo, politica_duplicados, colunas)
+    if df is None:
+        df = pipeline_dados(caminho_arquivo, politica_duplicados, colunas)
+        try:
+            snapshot.salvar_snapshot(
+                df, caminho_parquet, caminho_arquivo, politica_duplicados, completo=colunas is None
+            )
+        except OSError:
+            pass
+    return df
+
+def dataset_compartilhado_ativo():
+    return os.environ.get(VARIAVEL_DATASET_COMPARTILHADO, '') not in ('', '0')
+
+@cronometrar()
+def carregar_dados_compartilhados(caminho_arquivo, colunas=None, politica_duplicados=None):
+    # Com vários processos do Streamlit, o primeiro que não encontrar o arquivo
+    # .arrow publica o dataset tratado e os demais só o mapeiam. O DataFrame
+    # devolvido aponta para o arquivo e não pode ser alterado. Devolve também
+    # os deltas que o arquivo já inclui (ver sincronizar_compartilhado).
+    politica_duplicados = politica_duplicados or politica_duplicados_configurada()
+    caminho_arrow = snapshot.caminho_compartilhado(caminho_arquivo)
+    aberto = snapshot.abrir_compartilhado(caminho_arrow, caminho_arquivo, politica_duplicados, colunas)
+    if aberto is not None:
+        return aberto[0], snapshot.deltas_publicados(aberto[1])
+    df = carregar_dados_tratados(caminho_arquivo, colunas, politica_duplicados)
+    try:
+        snapshot.salvar_compartilhado(
+            df, caminho_arrow, caminho_arquivo, politica_duplicados, completo=colunas is None
+        )
+    except OSError:
+        return df, []
+    aberto = snapshot.abrir_compartilhado(caminho_arrow, caminho_arquivo, politica_duplicados, colunas)
+    return (df, []) if aberto is None else (aberto[0], snapshot.deltas_publicados(aberto[1]))
+
+# =========================
+# Módulo: Cache do Dataset
+# =========================
+
+# Um único DataFrame tratado por arquivo e conjunto de colunas, compartilhado por
+# todas as páginas e sessões do processo. O DataFrame devolvido é somente leitura: quem precisar
+# alterá-lo deve trabalhar sobre uma cópia.
+#
+# Cada versão dos dados é um estado imutável: {'df', 'estruturas', 'versao'}.
+# Um delta não altera o estado em uso, cria outro; quem ainda lê o anterior
+# continua vendo DataFrame, estruturas e versão coerentes entre si.
+_cache_datasets = {}
+_trava_cache = threading.RLock()
+_consultas_cache = {'acertos': 0, 'falhas': 0}
+# Estados fixados pela execução em andamento em cada thread (ver fixar_dataset).
+_local = threading.local()
+
+def assinatura_arquivo(caminho_arquivo):
+    info = os.stat(caminho_arquivo)
+    return (info.st_mtime_ns, info.st_size)
+
+def chave_dataset(caminho_arquivo, colunas):
+    return (os.path.abspath(caminho_arquivo), None if colunas is None else tuple(colunas))
+
+def novo_estado(df, assinatura, politica, deltas):
+    # 'deltas' são os arquivos de delta já incluídos em df e 'politica' a política
+    # de duplicados com que o CSV foi lido (ver carregar_restaurantes); 'ids' é o
+    # índice de IDs usado pelos deltas, montado na primeira vez que um chega.
+    return {
+        'df': df, 'estruturas': {}, 'travas': {}, 'versao': (*assinatura, len(deltas)),
+        'politica': politica, 'deltas': tuple(deltas), 'ids': None,
+    }
+
+def obter_entrada(caminho_arquivo, colunas=COLUNAS_PAINEL):
+    caminho_arquivo = os.path.abspath(caminho_arquivo)
+    assinatura = assinatura_arquivo(caminho_arquivo)
+    politica = politica_duplicados_configurada()
+    chave = chave_dataset(caminho_arquivo, colunas)
+    with _trava_cache:
+        entrada = _cache_datasets.get(chave)
+        if entrada is not None and entrada['assinatura'] == assinatura and entrada['politica'] == politica:
+            _consultas_cache['acertos'] += 1
+        else:
+            _consultas_cache['falhas'] += 1
+            colunas = None if colunas is None else list(colunas)
+            if dataset_compartilhado_ativo():
+                df, deltas = carregar_dados_compartilhados(caminho_arquivo, colunas, politica)
+            else:
+                df, deltas = carregar_dados_tratados(caminho_arquivo, colunas, politica), []
+            entrada = {
+                'assinatura': assinatura, 'politica': politica, 'colunas': colunas,
+                'estado': novo_estado(df, assinatura, politica, deltas),
+                'deltas': deltas, 'rejeitados': set(), 'verificado_em': None,
+            }
+            _cache_datasets[chave] = entrada
+        aplicar_deltas_pendentes(entrada, caminho_arquivo)
+    return entrada
+
+def estados_fixados():
+    if not hasattr(_local, 'fixados'):
+        _local.fixados = {}
+    return _local.fixados
+
+def obter_estado(caminho_arquivo=CAMINHO_PADRAO, colunas=COLUNAS_PAINEL):
+    # O estado fixado pela execução atual desta thread, ou o mais recente.
+    estado = estados_fixados().get(chave_dataset(caminho_arquivo, colunas))
+    if estado is not None:
+        return estado
+    return obter_entrada(caminho_arquivo, colunas)['estado']
+
+def fixar_dataset(caminho_arquivo=CAMINHO_PADRAO, colunas=COLUNAS_PAINEL):
+    # Chamada no início de cada execução de uma página: até a próxima chamada,
+    # tudo o que a thread ler do dataset (DataFrame, estruturas e versão) vem
+    # do mesmo estado, mesmo que outra sessão aplique um delta no meio.
+    estado = obter_entrada(caminho_arquivo, colunas)['estado']
+    estados_fixados()[chave_dataset(caminho_arquivo, colunas)] = estado
+    return estado
+
+@contextmanager
+def estado_fixado(estado, caminho_arquivo=CAMINHO_PADRAO, colunas=COLUNAS_PAINEL):
+    # Fixa um estado só dentro do bloco e depois restaura o anterior.
+    fixados = estados_fixados()
+    chave = chave_dataset(caminho_arquivo, colunas)
+    anterior = fixados.get(chave)
+    fixados[chave] = estado
+    try:
+        yield estado
+    finally:
+        if anterior is None:
+            del fixados[chave]
+        else:
+            fixados[chave] = anterior
+
+def dataset_fixo(caminho_arquivo=CAMINHO_PADRAO, colunas=COLUNAS_PAINEL):
+    # Para quem atende pedidos fora das páginas (ex.: a API): o estado mais
+    # recente fica fixado durante o bloco.
+    return estado_fixado(obter_entrada(caminho_arquivo, colunas)['estado'], caminho_arquivo, colunas)
+
+def carregar_dataset(caminho_arquivo=CAMINHO_PADRAO, colunas=COLUNAS_PAINEL):
+    # colunas=None carrega todas as colunas tratadas.
+    return obter_estado(caminho_arquivo, colunas)['df']
+
+def obter_estrutura(nome, construir, caminho_arquivo=CAMINHO_PADRAO, colunas=COLUNAS_PAINEL):
+    # Estruturas derivadas (agregados, índices) são construídas uma vez por
+    # estado do dataset, sobre o DataFrame desse estado; estruturas que usam
+    # outras durante a construção recebem as do mesmo estado. Cada estrutura
+    # tem sua trava, para estruturas diferentes poderem ser construídas ao
+    # mesmo tempo (ver preparar_estruturas).
+    estado = obter_estado(caminho_arquivo, colunas)
+    with _trava_cache:
+        if nome in estado['estruturas']:
+            return estado['estruturas'][nome]
+        trava = estado['travas'].setdefault(nome, threading.Lock())
+    with trava:
+        if nome not in estado['estruturas']:
+            with medir_etapa(f'estrutura.{nome}'), estado_fixado(estado, caminho_arquivo, colunas):
+                estrutura = construir(estado['df'])
+            with _trava_cache:
+                estado['estruturas'][nome] = estrutura
+        return estado['estruturas'][nome]
+
+def versao_dataset(caminho_arquivo=CAMINHO_PADRAO):
+    # Identifica a versão dos dados em uso; entra nas chaves dos caches derivados.
+    # O número de deltas aplicados faz parte dela (ver aplicar_deltas_pendentes).
+    return obter_estado(caminho_arquivo)['versao']
+
+def estatisticas_cache_dataset():
+    with _trava_cache:
+        consultas = _consultas_cache['acertos'] + _consultas_cache['falhas']
+        return {
+            'itens': len(_cache_datasets),
+            'acertos': _consultas_cache['acertos'],
+            'falhas': _consultas_cache['falhas'],
+            'taxa_acerto': _consultas_cache['acertos'] / consultas if consultas else 0.0,
+        }
+
+registrar_cache('dataset', estatisticas_cache_dataset)
+
+def limpar_cache_dataset():
+    with _trava_cache:
+        _cache_datasets.clear()
+    estados_fixados().clear()
+
+# =========================
+# Módulo: Construção em Paralelo
+# =========================
+
+# Threads que constroem as estruturas de uma página ao mesmo tempo; com uma só,
+# elas são construídas em sequência, na thread da página.
+TRABALHADORES_ESTRUTURAS = int(os.environ.get('FOME_ZERO_TRABALHADORES_ESTRUTURAS', min(4, os.cpu_count() or 1)))
+_pool_estruturas = None
+_trava_pool = threading.Lock()
+
+def pool_estruturas():
+    global _pool_estruturas
+    with _trava_pool:
+        if _pool_estruturas is None:
+            _pool_estruturas = ThreadPoolExecutor(TRABALHADORES_ESTRUTURAS, thread_name_prefix='fome_zero_estruturas')
+        return _pool_estruturas
+
+def executar_com_estados(fixados, contexto, obter):
+    # Roda no pool com os estados fixados e os registros de tempo da execução que pediu.
+    _local.fixados = fixados
+    try:
+        return executar_no_contexto(contexto, obter)
+    finally:
+        del _local.fixados
+
+def preparar_estruturas(*obter):
+    # obter: funções sem argumentos (obter_cubo, obter_histograma_notas...) de
+    # estruturas independentes. As que faltam são construídas ao mesmo tempo no
+    # pool (groupby, ordenação e bincount liberam o GIL), sobre o estado do
+    # dataset fixado por esta execução; devolve os resultados na ordem dos
+    # argumentos, e a página desenha com eles na sua própria thread.
+    if TRABALHADORES_ESTRUTURAS <= 1 or len(obter) <= 1:
+        return [funcao() for funcao in obter]
+    with medir_etapa('dados.preparar_estruturas'):
+        fixados, contexto = dict(estados_fixados()), contexto_execucao()
+        futuros = [pool_estruturas().submit(executar_com_estados, fixados, contexto, funcao) for funcao in obter]
+        return [futuro.result() for futuro in futuros]
+
+# =========================
+# Módulo: Atualização Incremental
+# =========================
+
+# Arquivos de delta (mesmo schema do zomato.csv) ficam em data/zomato_deltas/ e
+# são aplicados em ordem de nome: um Restaurant ID já existente tem a linha
+# substituída na mesma posição, um novo entra no fim. Só as linhas do delta
+# passam pelo pipeline; as estruturas com função de atualização registrada
+# (cubos, histograma, índices de filtros e espacial) são corrigidas pela
+# contribuição dessas linhas, e as demais (índice de culinárias, rankings) são
+# descartadas e reconstruídas sob demanda.
+#
+# Custo que ainda acompanha o tamanho do dataset: cada coluna é copiada uma vez
+# por delta (concatenação vetorizada, sem laço em Python) e os índices por
+# posição são copiados com np.insert. Com o dataset compartilhado, o processo
+# que aplica um lote também regrava o arquivo .arrow (ver sincronizar_compartilhado).
+# Deltas devem vir em lotes, não linha a linha.
+#
+# Só arquivos terminados são lidos: quem gera um delta deve escrevê-lo com um
+# nome temporário (começando com '.' ou sem a extensão .csv) e renomeá-lo ao
+# final. Como proteção extra, arquivos modificados há menos de
+# ESPERA_DELTA_ESTAVEL segundos ficam para a verificação seguinte, e um
+# arquivo que mude depois de aplicado (nome, tamanho e data) é aplicado de
+# novo. Um delta que não pode ser lido ou aplicado é movido para
+# rejeitados/ e o painel continua com os dados que já tinha.
+INTERVALO_VERIFICACAO_DELTAS = 2.0
+ESPERA_DELTA_ESTAVEL = 2.0
+PASTA_REJEITADOS = 'rejeitados'
+_atualizacoes = {}
+
+def registrar_atualizacao(nome, atualizar):
+    # atualizar(estrutura, removidas, inseridas, df_novo) -> estrutura atualizada,
+    # onde removidas são as linhas antigas dos IDs substituídos e inseridas as
+    # linhas do delta já tratadas, indexadas pela posição em df_novo: primeiro
+    # as substitutas, na ordem de removidas, depois as novas.
+    _atualizacoes[nome] = atualizar
+
+def pasta_deltas(caminho_arquivo):
+    return os.path.splitext(caminho_arquivo)[0] + '_deltas'
+
+def listar_deltas(caminho_arquivo):
+    # [(nome, tamanho, mtime_ns)] dos deltas prontos para leitura, em ordem de nome.
+    pasta = pasta_deltas(caminho_arquivo)
+    if not os.path.isdir(pasta):
+        return []
+    limite = time.time_ns() - int(ESPERA_DELTA_ESTAVEL * 1e9)
+    deltas = []
+    for item in os.scandir(pasta):
+        if not item.is_file() or item.name.startswith('.') or not item.name.endswith('.csv'):
+            continue
+        info = item.stat()
+        if info.st_mtime_ns <= limite:
+            deltas.append((item.name, info.st_size, info.st_mtime_ns))
+    return sorted(deltas)
+
+@cronometrar()
+def ler_delta(caminho_delta):
+    # Dentro de um mesmo delta vale a última linha de cada Restaurant ID. O
+    # arquivo é lido e validado com todas as colunas, para ser aceito ou
+    # rejeitado da mesma forma por qualquer conjunto de colunas em cache.
+    return pipeline_dados(caminho_delta, politica_duplicados='ultimo')
+
+def rejeitar_delta(entrada, caminho_arquivo, identificacao):
+    nome = identificacao[0]
+    pasta_rejeitados = os.path.join(pasta_deltas(caminho_arquivo), PASTA_REJEITADOS)
+    try:
+        os.makedirs(pasta_rejeitados, exist_ok=True)
+        os.replace(os.path.join(pasta_deltas(caminho_arquivo), nome), os.path.join(pasta_rejeitados, nome))
+    except OSError:
+        # Sem permissão para mover (ou outro processo já moveu): só deixa de tentar.
+        logger.warning("Delta %s rejeitado, mas não pôde ser movido para %s", nome, pasta_rejeitados)
+        entrada['rejeitados'].add(identificacao)
+    else:
+        logger.warning("Delta %s movido para %s", nome, pasta_rejeitados)
+
+def combinar_coluna(base, parte, posicoes_substituidas, substitutas, novas):
+    if isinstance(base.dtype, pd.CategoricalDtype):
+        categorias = base.cat.categories.union(parte.cat.categories)
+        if not categorias.equals(base.cat.categories):
+            base = base.cat.set_categories(categorias)
+        parte = parte.cat.set_categories(categorias)
+    else:
+        parte = parte.astype(base.dtype)
+    coluna = pd.concat([base, parte[novas]], ignore_index=True)
+    if len(posicoes_substituidas):
+        coluna.iloc[posicoes_substituidas] = parte[substitutas].to_numpy()
+    return coluna
+
+def indexar_ids(df):
+    # IDs ordenados e a posição de cada um no DataFrame, para localizar as
+    # linhas de um delta por busca binária.
+    ids = df['restaurant_id'].to_numpy()
+    ordem = np.argsort(ids, kind='stable')
+    return ids[ordem], ordem
+
+def posicoes_dos_ids(indice_ids, ids):
+    # Posição de cada ID no DataFrame, ou -1 para IDs que ainda não existem.
+    ids_ordenados, posicoes = indice_ids
+    if not len(ids_ordenados):
+        return np.full(len(ids), -1, dtype=np.intp)
+    onde = np.minimum(np.searchsorted(ids_ordenados, ids), len(ids_ordenados) - 1)
+    return np.where(ids_ordenados[onde] == ids, posicoes[onde], -1).astype(np.intp)
+
+def incluir_ids(indice_ids, ids, primeira_posicao):
+    ids_ordenados, posicoes = indice_ids
+    ordem = np.argsort(ids, kind='stable')
+    onde = np.searchsorted(ids_ordenados, ids[ordem])
+    return (
+        np.insert(ids_ordenados, onde, ids[ordem]),
+        np.insert(posicoes, onde, primeira_posicao + ordem),
+    )
+
+def mesclar_delta(df, indice_ids, delta):
+    # Aplica o delta às colunas de df sem alterá-lo. Devolve o DataFrame novo,
+    # as posições de cada linha do delta no DataFrame novo e o índice de IDs
+    # atualizado. Cada coluna é copiada uma vez (O(linhas do dataset) em
+    # memcpy); o resto do custo acompanha o tamanho do delta.
+    ids = delta['restaurant_id'].to_numpy()
+    posicoes = posicoes_dos_ids(indice_ids, ids)
+    substitutas = posicoes >= 0
+    novas = ~substitutas
+    df_novo = pd.DataFrame({
+        coluna: combinar_coluna(df[coluna], delta[coluna], posicoes[substitutas], substitutas, novas)
+        for coluna in df.columns
+    }, copy=False)
+    posicoes[novas] = len(df) + np.arange(novas.sum())
+    return df_novo, posicoes, substitutas, incluir_ids(indice_ids, ids[novas], len(df))
+
+@cronometrar()
+def aplicar_delta(entrada, delta, identificacao):
+    # Não altera o estado atual: devolve o seguinte.
+    estado = entrada['estado']
+    df = estado['df']
+    if estado['ids'] is None:
+        estado['ids'] = indexar_ids(df)
+    df_novo, posicoes, substitutas, indice_ids = mesclar_delta(df, estado['ids'], delta)
+    # Linhas antigas com as categorias do DataFrame novo, para os agregados
+    # poderem somar as duas partes. O índice das inseridas é a posição de cada
+    # uma no DataFrame novo.
+    removidas = pd.DataFrame({
+        coluna: df[coluna].take(posicoes[substitutas]).astype(df_novo[coluna].dtype).reset_index(drop=True)
+        for coluna in df.columns
+    })
+    inseridas = df_novo.take(np.concatenate([posicoes[substitutas], posicoes[~substitutas]]))
+
+    estado_novo = novo_estado(df_novo, entrada['assinatura'], entrada['politica'], [*estado['deltas'], identificacao])
+    estado_novo['ids'] = indice_ids
+    for nome, estrutura in estado['estruturas'].items():
+        if nome in _atualizacoes:
+            estado_novo['estruturas'][nome] = _atualizacoes[nome](estrutura, removidas, inseridas, df_novo)
+    return estado_novo
+
+def aplicar_deltas_pendentes(entrada, caminho_arquivo):
+    # Chamada com _trava_cache; a pasta é consultada no máximo a cada
+    # INTERVALO_VERIFICACAO_DELTAS segundos, ou logo que outro conjunto de
+    # colunas do mesmo arquivo estiver à frente (quem combina dois conjuntos
+    # de colunas vê a mesma versão nos dois).
+    agora = time.monotonic()
+    atrasada = any(
+        len(outra['deltas']) > len(entrada['deltas'])
+        for chave, outra in _cache_datasets.items() if chave[0] == caminho_arquivo
+    )
+    if not atrasada and entrada['verificado_em'] is not None and agora - entrada['verificado_em'] < INTERVALO_VERIFICACAO_DELTAS:
+        return
+    entrada['verificado_em'] = agora
+    aplicados = set(entrada['deltas'])
+    lidos = []
+    for identificacao in listar_deltas(caminho_arquivo):
+        if identificacao in aplicados or identificacao in entrada['rejeitados']:
+            continue
+        nome = identificacao[0]
+        try:
+            with medir_etapa('dados.delta'):
+                delta = ler_delta(os.path.join(pasta_deltas(caminho_arquivo), nome))
+                estado = aplicar_delta(entrada, delta, identificacao)
+        except Exception:
+            logger.exception("Delta %s não pôde ser aplicado; os dados atuais continuam em uso", nome)
+            rejeitar_delta(entrada, caminho_arquivo, identificacao)
+            continue
+        entrada['estado'] = estado
+        entrada['deltas'].append(identificacao)
+        lidos.append(delta)
+        logger.info("Delta %s aplicado (%d linhas)", nome, len(delta))
+    if lidos and dataset_compartilhado_ativo():
+        with medir_etapa('dados.delta_compartilhado'):
+            sincronizar_compartilhado(entrada, caminho_arquivo, lidos)
+
+def sincronizar_compartilhado(entrada, caminho_arquivo, lidos):
+    # Com o dataset compartilhado, o resultado dos deltas volta para o arquivo
+    # .arrow em vez de ficar como cópia privada em cada processo. O primeiro
+    # processo a aplicar um lote regrava o arquivo (com todas as colunas que
+    # ele tinha) e todos, inclusive ele, passam a mapear o arquivo novo. Quem
+    # encontrar o arquivo em outro ponto da sequência de deltas fica com a
+    # cópia privada até o próximo lote.
+    caminho_arrow = snapshot.caminho_compartilhado(caminho_arquivo)
+    aplicados = entrada['deltas']
+    aberto = snapshot.abrir_compartilhado(caminho_arrow, caminho_arquivo, entrada['politica'])
+    if aberto is None and entrada['colunas'] is not None:
+        aberto = snapshot.abrir_compartilhado(caminho_arrow, caminho_arquivo, entrada['politica'], entrada['colunas'])
+    if aberto is None:
+        return
+    base, metadados = aberto
+    publicados = snapshot.deltas_publicados(metadados)
+    if publicados == aplicados[:len(aplicados) - len(lidos)]:
+        indice_ids = indexar_ids(base)
+        for delta in lidos:
+            base, _, _, indice_ids = mesclar_delta(base, indice_ids, delta)
+        try:
+            snapshot.salvar_compartilhado(
+                base, caminho_arrow, caminho_arquivo, entrada['politica'], deltas=aplicados, origem=metadados
+            )
+        except OSError:
+            logger.warning("Não foi possível regravar %s; os deltas ficam em memória", caminho_arrow)
+            return
+    elif publicados != aplicados:
+        return
+    del base
+    aberto = snapshot.abrir_compartilhado(caminho_arrow, caminho_arquivo, entrada['politica'], entrada['colunas'])
+    if aberto is not None and snapshot.deltas_publicados(aberto[1]) == aplicados:
+        # Mesmos dados na mesma ordem: as estruturas do estado continuam valendo.
+        entrada['estado'] = dict(entrada['estado'], df=aberto[0])
+
+# =========================
+# Módulo: Leitura por Restaurante
+# =========================
+
+def linhas_do_csv(caminho_arquivo, politica, ids):
+    # Linhas tratadas, com todas as colunas, dos IDs pedidos: do snapshot Parquet
+    # completo, lendo só essas linhas; sem ele, o pipeline roda uma vez, grava
+    # o snapshot completo e o DataFrame inteiro é descartado ao final.
+    caminho_parquet = snapshot.caminho_snapshot(caminho_arquivo)
+    linhas = snapshot.ler_snapshot(caminho_parquet, caminho_arquivo, politica, ids=ids)
+    if linhas is not None:
+        return linhas
+    completo = pipeline_dados(caminho_arquivo, politica)
+    try:
+        snapshot.salvar_snapshot(completo, caminho_parquet, caminho_arquivo, politica)
+    except OSError:
+        pass
+    return completo[completo['restaurant_id'].isin(ids)].reset_index(drop=True)
+
+@cronometrar()
+def carregar_restaurantes(ids, caminho_arquivo=CAMINHO_PADRAO):
+    # Todas as colunas tratadas dos restaurantes em ids, na ordem de ids e na
+    # mesma versão dos dados do estado em uso pelo painel (fixado ou o mais
+    # recente), sem manter em cache o dataset completo. Os deltas do estado são
+    # relidos e sobrepostos às linhas do CSV; um delta alterado ou removido
+    # depois de aplicado fica de fora, com aviso no log.
+    estado = obter_estado(caminho_arquivo)
+    ids = np.asarray(ids, dtype=np.int64)
+    partes = [linhas_do_csv(caminho_arquivo, estado['politica'], np.unique(ids))]
+    atuais = set(listar_deltas(caminho_arquivo))
+    for identificacao in estado['deltas']:
+        if identificacao not in atuais:
+            logger.warning("Delta %s mudou depois de aplicado; fica fora da leitura", identificacao[0])
+            continue
+        delta = ler_delta(os.path.join(pasta_deltas(caminho_arquivo), identificacao[0]))
+        partes.append(delta.loc[delta['restaurant_id'].isin(ids), partes[0].columns])
+    # Vale a versão mais recente de cada restaurante: a do último delta que o inclui.
+    linhas = pd.concat(partes, ignore_index=True).drop_duplicates('restaurant_id', keep='last')
+    posicoes = pd.Index(linhas['restaurant_id']).get_indexer(ids)
+    return linhas.take(posicoes[posicoes >= 0]).reset_index(drop=True)
@@ -0,0 +1,164 @@
+import numpy as np
+
+from fome_zero.dados import obter_estrutura, registrar_atualizacao
+from fome_zero.filtros import VisaoFiltrada
+from fome_zero.instrumentacao import cronometrar
+
+# Lado das células da grade em graus (~1,1 km no equador). As cidades concentram
+# os restaurantes, então células pequenas mantêm poucos candidatos por consulta.
+TAMANHO_CELULA_INDICE = 0.01
+RAIO_TERRA_KM = 6371.0088
+KM_POR_GRAU = 2 * np.pi * RAIO_TERRA_KM / 360
+
+# =========================
+# Módulo: Índice Espacial
+# =========================
+
+def celulas_dos_pontos(latitudes, longitudes, tamanho_celula, num_colunas):
+    linhas = np.floor((np.clip(latitudes, -90, 90) + 90) / tamanho_celula).astype(np.int64)
+    colunas = np.floor((np.clip(longitudes, -180, 180) + 180) / tamanho_celula).astype(np.int64)
+    return linhas * num_colunas + np.minimum(colunas, num_colunas - 1)
+
+def normalizar_longitude(longitude):
+    # Leva para [-180, 180); o Leaflet devolve longitudes fora disso ao arrastar o mapa.
+    return (longitude + 180) % 360 - 180
+
+@cronometrar()
+def construir_indice_espacial(df, tamanho_celula=TAMANHO_CELULA_INDICE):
+    # Grade no estilo geohash: cada ponto recebe o número da sua célula e os
+    # pontos ficam ordenados por célula. Uma faixa contínua de células de uma
+    # mesma linha da grade vira um único intervalo no vetor ordenado, achado por
+    # busca binária.
+    latitudes = df['latitude'].to_numpy(dtype=float)
+    longitudes = df['longitude'].to_numpy(dtype=float)
+    validos = np.flatnonzero(~(np.isnan(latitudes) | np.isnan(longitudes)))
+    num_colunas = int(np.ceil(360 / tamanho_celula))
+    celulas = celulas_dos_pontos(latitudes[validos], longitudes[validos], tamanho_celula, num_colunas)
+    ordem = np.argsort(celulas, kind='stable')
+    posicoes = validos[ordem]
+    return {
+        'tamanho_celula': tamanho_celula,
+        'num_colunas': num_colunas,
+        'celulas': celulas[ordem],
+        'posicoes': posicoes,
+        'latitudes': latitudes[posicoes],
+        'longitudes': longitudes[posicoes],
+    }
+
+def obter_indice_espacial():
+    return obter_estrutura('indice_espacial', construir_indice_espacial)
+
+def atualizar_indice_espacial(indice, removidas, inseridas, df_novo):
+    # As linhas do delta saem da grade e voltam com as coordenadas novas, cada
+    # uma inserida no seu lugar da ordem (célula, posição) que a construção usa.
+    alteradas = inseridas.index.to_numpy()
+    alterada = np.zeros(len(df_novo), dtype=bool)
+    alterada[alteradas] = True
+    manter = ~alterada[indice['posicoes']]
+    parcial = construir_indice_espacial(inseridas, indice['tamanho_celula'])
+    posicoes_novas = alteradas[parcial['posicoes']]
+    celulas = indice['celulas'][manter]
+    posicoes = indice['posicoes'][manter]
+    ordem = np.argsort(parcial['celulas'] * len(df_novo) + posicoes_novas)
+    onde = np.searchsorted(celulas * len(df_novo) + posicoes, parcial['celulas'][ordem] * len(df_novo) + posicoes_novas[ordem])
+    return {
+        'tamanho_celula': indice['tamanho_celula'],
+        'num_colunas': indice['num_colunas'],
+        'celulas': np.insert(celulas, onde, parcial['celulas'][ordem]),
+        'posicoes': np.insert(posicoes, onde, posicoes_novas[ordem]),
+        'latitudes': np.insert(indice['latitudes'][manter], onde, parcial['latitudes'][ordem]),
+        'longitudes': np.insert(indice['longitudes'][manter], onde, parcial['longitudes'][ordem]),
+    }
+
+registrar_atualizacao('indice_espacial', atualizar_indice_espacial)
+
+# =========================
+# Módulo: Consultas Espaciais
+# =========================
+
+def candidatos_retangulo(indice, sul, oeste, norte, leste):
+    # Posições (no vetor ordenado do índice) dos pontos das células que cobrem o
+    # retângulo. Um retângulo que cruza o antimeridiano (oeste > leste) é
+    # dividido em dois.
+    if oeste > leste:
+        return np.concatenate([
+            candidatos_retangulo(indice, sul, oeste, norte, 180.0),
+            candidatos_retangulo(indice, sul, -180.0, norte, leste),
+        ])
+    tamanho, num_colunas = indice['tamanho_celula'], indice['num_colunas']
+    linha_inicial, coluna_inicial = divmod(int(celulas_dos_pontos(sul, oeste, tamanho, num_colunas)), num_colunas)
+    linha_final, coluna_final = divmod(int(celulas_dos_pontos(norte, leste, tamanho, num_colunas)), num_colunas)
+    linhas_grade = np.arange(linha_inicial, linha_final + 1, dtype=np.int64) * num_colunas
+    inicios = np.searchsorted(indice['celulas'], linhas_grade + coluna_inicial, side='left')
+    fins = np.searchsorted(indice['celulas'], linhas_grade + coluna_final, side='right')
+    quantidades = fins - inicios
+    if not quantidades.sum():
+        return np.empty(0, dtype=np.intp)
+    # Concatena os intervalos [início, fim) sem laço em Python.
+    deslocamentos = np.arange(quantidades.sum()) - np.repeat(np.cumsum(quantidades) - quantidades, quantidades)
+    return np.repeat(inicios, quantidades) + deslocamentos
+
+def posicoes_no_retangulo(indice, sul, oeste, norte, leste):
+    # Linhas do DataFrame com sul <= latitude <= norte e longitude entre oeste e
+    # leste (os limites de um mapa), em ordem crescente.
+    if leste - oeste >= 360:
+        oeste, leste = -180.0, 180.0
+    else:
+        oeste, leste = normalizar_longitude(oeste), normalizar_longitude(leste)
+    candidatos = candidatos_retangulo(indice, sul, oeste, norte, leste)
+    latitudes, longitudes = indice['latitudes'][candidatos], indice['longitudes'][candidatos]
+    dentro_longitude = (
+        (longitudes >= oeste) | (longitudes <= leste) if oeste > leste
+        else (longitudes >= oeste) & (longitudes <= leste)
+    )
+    dentro = (latitudes >= sul) & (latitudes <= norte) & dentro_longitude
+    return np.sort(indice['posicoes'][candidatos[dentro]])
+
+def distancia_km(latitude, longitude, latitudes, longitudes):
+    # Fórmula de haversine.
+    lat1, lon1, lat2, lon2 = map(np.radians, (latitude, longitude, latitudes, longitudes))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAIO_TERRA_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def retangulo_do_raio(latitude, longitude, raio_km):
+    delta_latitude = raio_km / KM_POR_GRAU
+    sul, norte = max(latitude - delta_latitude, -90.0), min(latitude + delta_latitude, 90.0)
+    cosseno = np.cos(np.radians(max(abs(sul), abs(norte))))
+    if sul <= -90 or norte >= 90 or raio_km / KM_POR_GRAU >= 180 * cosseno:
+        return sul, -180.0, norte, 180.0
+    delta_longitude = raio_km / (KM_POR_GRAU * cosseno)
+    oeste = normalizar_longitude(longitude - delta_longitude)
+    leste = normalizar_longitude(longitude + delta_longitude)
+    return sul, oeste, norte, leste
+
+def posicoes_no_raio(indice, latitude, longitude, raio_km):
+    # Restaurantes a até raio_km do ponto: (posições, distâncias em km), do mais
+    # próximo para o mais distante.
+    candidatos = candidatos_retangulo(indice, *retangulo_do_raio(latitude, longitude, raio_km))
+    distancias = distancia_km(latitude, longitude, indice['latitudes'][candidatos], indice['longitudes'][candidatos])
+    dentro = distancias <= raio_km
+    candidatos, distancias = candidatos[dentro], distancias[dentro]
+    ordem = np.argsort(distancias, kind='stable')
+    return indice['posicoes'][candidatos[ordem]], distancias[ordem]
+
+def mais_proximos(indice, latitude, longitude, k=1):
+    # Busca em raios crescentes, começando pelo tamanho de uma célula: o raio
+    # dobra até haver k restaurantes dentro dele, então o custo fica dominado
+    # pela última rodada, proporcional aos restaurantes vizinhos.
+    raio_km = indice['tamanho_celula'] * KM_POR_GRAU
+    while True:
+        posicoes, distancias = posicoes_no_raio(indice, latitude, longitude, raio_km)
+        if len(posicoes) >= k or raio_km >= np.pi * RAIO_TERRA_KM:
+            return posicoes[:k], distancias[:k]
+        raio_km *= 2
+
+# =========================
+# Módulo: Seleções para as Páginas
+# =========================
+
+def filtrar_retangulo(df, indice, sul, oeste, norte, leste):
+    return VisaoFiltrada(df, posicoes_no_retangulo(indice, sul, oeste, norte, leste))
+
+def filtrar_raio(df, indice, latitude, longitude, raio_km):
+    posicoes, _ = posicoes_no_raio(indice, latitude, longitude, raio_km)
+    return VisaoFiltrada(df, np.sort(posicoes))
@@ -0,0 +1,60 @@
+import io
+
+from fome_zero.cache import CacheLRU
+from fome_zero.dados import carregar_restaurantes
+from fome_zero.instrumentacao import cronometrar, registrar_cache
+
+LIMITE_BYTES_CACHE_EXPORTACAO = 128 * 1024 * 1024
+LINHAS_POR_BLOCO_CSV = 50_000
+# Colunas de uso interno do painel, fora do arquivo exportado.
+COLUNAS_INTERNAS = ['all_cuisines']
+
+# Rótulo exibido: (nome do arquivo, tipo MIME)
+FORMATOS_EXPORTACAO = {
+    'CSV': ('dados_tratados.csv', 'text/csv'),
+    'CSV (gzip)': ('dados_tratados.csv.gz', 'application/gzip'),
+    'Parquet': ('dados_tratados.parquet', 'application/vnd.apache.parquet'),
+}
+
+# =========================
+# Módulo: Serialização
+# =========================
+
+@cronometrar()
+def dados_exportacao(df_filtrado):
+    # As páginas trabalham só com as colunas do painel; o arquivo leva todas as
+    # colunas tratadas (endereço, moeda, entrega etc.) dos mesmos restaurantes,
+    # lidas só para os IDs filtrados.
+    linhas = carregar_restaurantes(df_filtrado['restaurant_id'].to_numpy())
+    return linhas.drop(columns=COLUNAS_INTERNAS)
+
+@cronometrar()
+def serializar(df, formato):
+    # O CSV é escrito em blocos de linhas direto no buffer binário, sem montar
+    # antes uma string com o arquivo inteiro.
+    buffer = io.BytesIO()
+    if formato == 'CSV':
+        df.to_csv(buffer, index=False, encoding='utf-8', chunksize=LINHAS_POR_BLOCO_CSV)
+    elif formato == 'CSV (gzip)':
+        df.to_csv(buffer, index=False, encoding='utf-8', chunksize=LINHAS_POR_BLOCO_CSV, compression={'method': 'gzip'})
+    elif formato == 'Parquet':
+        df.to_parquet(buffer, index=False)
+    else:
+        raise ValueError(f"Formato de exportação desconhecido: {formato!r}")
+    return buffer.getvalue()
+
+# =========================
+# Módulo: Cache de Exportações
+# =========================
+
+_cache_exportacoes = CacheLRU(LIMITE_BYTES_CACHE_EXPORTACAO, medir_tamanho=len)
+registrar_cache('exportacoes', _cache_exportacoes.estatisticas)
+
+def exportacao_pronta(chave_filtros, formato):
+    return (chave_filtros, formato) in _cache_exportacoes
+
+def obter_exportacao(df_filtrado, chave_filtros, formato):
+    return _cache_exportacoes.obter((chave_filtros, formato), lambda: serializar(dados_exportacao(df_filtrado), formato))
+
+def estatisticas_cache_exportacoes():
+    return _cache_exportacoes.estatisticas()
@@ -0,0 +1,114 @@
+import numpy as np
+
+from fome_zero.instrumentacao import cronometrar
+from fome_zero.dados import obter_estrutura, registrar_atualizacao
+
+COLUNAS_INDEXADAS = ['country', 'country_code', 'price_category']
+
+# =========================
+# Módulo: Índice de Filtros
+# =========================
+
+@cronometrar()
+def construir_indice_filtros(df):
+    # Para cada coluna filtrável, as posições (ordenadas) das linhas de cada valor.
+    return {
+        coluna: df.groupby(coluna, observed=True).indices
+        for coluna in COLUNAS_INDEXADAS if coluna in df.columns
+    }
+
+def obter_indice_filtros():
+    return obter_estrutura('indice_filtros', construir_indice_filtros)
+
+def atualizar_indice_filtros(indice, removidas, inseridas, df_novo):
+    # As linhas do delta saem das listas dos seus valores antigos e entram nas
+    # dos novos, por busca binária; só as listas desses valores são copiadas.
+    alteradas = inseridas.index.to_numpy()
+    substituidas = alteradas[:len(removidas)]
+    atualizado = {}
+    for coluna, posicoes_por_valor in indice.items():
+        posicoes_por_valor = dict(posicoes_por_valor)
+        for valor, grupo in removidas.groupby(coluna, observed=True).indices.items():
+            atuais = posicoes_por_valor[valor]
+            restantes = np.delete(atuais, np.searchsorted(atuais, np.sort(substituidas[grupo])))
+            if len(restantes):
+                posicoes_por_valor[valor] = restantes
+            else:
+                del posicoes_por_valor[valor]
+        for valor, grupo in inseridas.groupby(coluna, observed=True).indices.items():
+            novas = np.sort(alteradas[grupo])
+            atuais = posicoes_por_valor.get(valor)
+            posicoes_por_valor[valor] = novas if atuais is None else np.insert(atuais, np.searchsorted(atuais, novas), novas)
+        atualizado[coluna] = posicoes_por_valor
+    return atualizado
+
+registrar_atualizacao('indice_filtros', atualizar_indice_filtros)
+
+def posicoes_selecionadas(indice, coluna, valores):
+    listas = [indice[coluna][valor] for valor in valores if valor in indice[coluna]]
+    if not listas:
+        return np.empty(0, dtype=np.intp)
+    return np.sort(np.concatenate(listas))
+
+@cronometrar()
+def filtrar(df, indice, selecoes):
+    # selecoes: {coluna: valores selecionados}. Cada coluna é resolvida pelo
+    # índice e as seleções são combinadas pela interseção das posições (já
+    # ordenadas e sem repetição), então o custo acompanha o número de linhas
+    # selecionadas, não o tamanho do DataFrame, e nada é copiado até o uso.
+    posicoes = None
+    for coluna, valores in selecoes.items():
+        atuais = posicoes_selecionadas(indice, coluna, valores)
+        posicoes = atuais if posicoes is None else np.intersect1d(posicoes, atuais, assume_unique=True)
+    if posicoes is None:
+        posicoes = np.arange(len(df))
+    return VisaoFiltrada(df, posicoes)
+
+# =========================
+# Módulo: Visão Filtrada
+# =========================
+
+class VisaoFiltrada:
+    """Linhas selecionadas de um DataFrame, copiadas só quando usadas.
+
+    Colunas isoladas (``visao['city']``) são extraídas apenas nas posições
+    selecionadas; qualquer outro uso de DataFrame materializa a seleção uma vez.
+    """
+
+    def __init__(self, base, posicoes):
+        self.base = base
+        self.posicoes = posicoes
+        self._df = None
+
+    @property
+    def columns(self):
+        return self.base.columns
+
+    @property
+    def shape(self):
+        return (len(self.posicoes), self.base.shape[1])
+
+    @property
+    def empty(self):
+        return len(self.posicoes) == 0
+
+    def __len__(self):
+        return len(self.posicoes)
+
+    def __getitem__(self, chave):
+        if self._df is None and isinstance(chave, str):
+            return self.base[chave].take(self.posicoes)
+        return self.materializar()[chave]
+
+    def materializar(self):
+        if self._df is None:
+            self._df = self.base.take(self.posicoes)
+        return self._df
+
+    def __getattr__(self, nome):
+        # Só chamado para atributos que a visão não tem. Nomes privados não são
+        # repassados: copy e pickle os procuram antes de __init__ rodar, e
+        # materializar() leria self.base, caindo de novo aqui (recursão).
+        if nome.startswith('_'):
+            raise AttributeError(nome)
+        return getattr(self.materializar(), nome)
@@ -0,0 +1,51 @@
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from fome_zero.cache import CacheLRU
+from fome_zero.instrumentacao import registrar_cache
+
+LIMITE_BYTES_CACHE_FIGURAS = 16 * 1024 * 1024
+# Valores dos eixos são arredondados antes de ir para o navegador; quatro casas
+# bastam para médias de notas e votos e encurtam bastante o JSON.
+CASAS_DECIMAIS = 4
+
+# =========================
+# Módulo: Compactação de Figuras
+# =========================
+
+def compactar_figura(fig):
+    # O Plotly Express embute no layout o template inteiro, com padrões para
+    # todos os tipos de trace; só os tipos usados na figura são mantidos. O
+    # layout do template fica, pois o tema do Streamlit é aplicado sobre ele.
+    template = fig.layout.template
+    tipos = {trace.type for trace in fig.data}
+    dados_template = {tipo: getattr(template.data, tipo) for tipo in tipos if getattr(template.data, tipo, None)}
+    fig.layout.template = go.layout.Template(layout=template.layout, data=dados_template)
+    for trace in fig.data:
+        for eixo in ('x', 'y'):
+            valores = getattr(trace, eixo, None)
+            if isinstance(valores, np.ndarray) and valores.dtype.kind == 'f':
+                setattr(trace, eixo, np.round(valores, CASAS_DECIMAIS))
+    return fig
+
+def tamanho_figura(fig):
+    return len(pio.to_json(fig, validate=False))
+
+# =========================
+# Módulo: Cache de Figuras
+# =========================
+
+_cache_figuras = CacheLRU(LIMITE_BYTES_CACHE_FIGURAS, medir_tamanho=tamanho_figura)
+registrar_cache('figuras', _cache_figuras.estatisticas)
+
+def obter_figura(chave, construir):
+    # chave: (gráfico, chave dos filtros, parâmetros do gráfico). Sem chave a
+    # figura é montada a cada chamada. A figura em cache é compartilhada e não
+    # deve ser alterada.
+    if chave is None or chave[1] is None:
+        return compactar_figura(construir())
+    return _cache_figuras.obter(chave, lambda: compactar_figura(construir()))
+
+def estatisticas_cache_figuras():
+    return _cache_figuras.estatisticas()
@@ -0,0 +1,100 @@
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pandas as pd
+
+from fome_zero import snapshot
+from fome_zero.dados import CAMINHO_PADRAO, TIPOS_COLUNAS_CSV, colunas_brutas, projetar_colunas, tratar_dados
+from fome_zero.agregados import DIMENSOES_CUBO, COLUNAS_CUBO, construir_cubo
+
+TAMANHO_BLOCO_PADRAO = 200_000
+
+# =========================
+# Módulo: Leitura em Blocos
+# =========================
+
+def ler_em_blocos(caminho_arquivo, tamanho_bloco=TAMANHO_BLOCO_PADRAO, colunas=None):
+    return pd.read_csv(
+        caminho_arquivo, usecols=colunas_brutas(colunas), dtype=TIPOS_COLUNAS_CSV, chunksize=tamanho_bloco
+    )
+
+def remover_duplicados_em_fluxo(bloco, ids_vistos):
+    # Em fluxo só é possível manter a primeira ocorrência de cada Restaurant ID
+    # (política 'primeiro'); a memória extra é o conjunto de IDs já vistos.
+    ids = bloco['Restaurant ID']
+    repetidos = ids.duplicated() | ids.isin(ids_vistos)
+    ids_vistos.update(ids[~repetidos].tolist())
+    if not repetidos.any():
+        return bloco
+    return bloco[~repetidos].reset_index(drop=True)
+
+def mapear_em_ordem(funcao, itens, processos):
+    # Distribui os blocos entre processos mantendo a ordem de saída e no máximo
+    # 2 × processos blocos em memória ao mesmo tempo.
+    if processos <= 1:
+        for item in itens:
+            yield funcao(item)
+        return
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        pendentes = deque()
+        for item in itens:
+            pendentes.append(executor.submit(funcao, item))
+            if len(pendentes) >= 2 * processos:
+                yield pendentes.popleft().result()
+        while pendentes:
+            yield pendentes.popleft().result()
+
+def blocos_sem_duplicados(caminho_arquivo, tamanho_bloco=TAMANHO_BLOCO_PADRAO, colunas=None):
+    ids_vistos = set()
+    with ler_em_blocos(caminho_arquivo, tamanho_bloco, colunas) as leitor:
+        for bloco in leitor:
+            yield remover_duplicados_em_fluxo(bloco, ids_vistos)
+
+def tratar_bloco(bloco, colunas=None):
+    return projetar_colunas(tratar_dados(bloco), colunas)
+
+def blocos_tratados(caminho_arquivo, tamanho_bloco=TAMANHO_BLOCO_PADRAO, processos=1, colunas=None):
+    blocos = blocos_sem_duplicados(caminho_arquivo, tamanho_bloco, colunas)
+    return mapear_em_ordem(partial(tratar_bloco, colunas=colunas), blocos, processos)
+
+# =========================
+# Módulo: Destinos da Ingestão
+# =========================
+
+def gerar_snapshot_em_blocos(caminho_arquivo, caminho_parquet=None, tamanho_bloco=TAMANHO_BLOCO_PADRAO, processos=1):
+    # A leitura em fluxo segue a política 'primeiro'; com outra política
+    # configurada o painel ignora este snapshot e roda o pipeline inteiro.
+    caminho_parquet = caminho_parquet or snapshot.caminho_snapshot(caminho_arquivo)
+    snapshot.salvar_snapshot_em_blocos(
+        blocos_tratados(caminho_arquivo, tamanho_bloco, processos), caminho_parquet, caminho_arquivo, 'primeiro'
+    )
+    return caminho_parquet
+
+def construir_cubo_em_blocos(caminho_arquivo, tamanho_bloco=TAMANHO_BLOCO_PADRAO, processos=1):
+    # Cada bloco já chega sem duplicados, então somar restaurantes_distintos
+    # entre blocos continua exato.
+    blocos = blocos_tratados(caminho_arquivo, tamanho_bloco, processos, COLUNAS_CUBO)
+    parciais = [construir_cubo(bloco) for bloco in blocos]
+    if not parciais:
+        return None
+    cubo = pd.concat(parciais, ignore_index=True)
+    for dimensao in DIMENSOES_CUBO:
+        cubo[dimensao] = cubo[dimensao].astype(str).astype('category')
+    return cubo.groupby(DIMENSOES_CUBO, observed=True).sum().reset_index()
+
+# =========================
+# Módulo: Etapa de Build
+# =========================
+
+def main(argumentos=None):
+    argumentos = sys.argv[1:] if argumentos is None else argumentos
+    caminho_csv = argumentos[0] if argumentos else CAMINHO_PADRAO
+    processos = int(argumentos[1]) if len(argumentos) > 1 else os.cpu_count() or 1
+    destino = gerar_snapshot_em_blocos(caminho_csv, processos=processos)
+    print(f'Snapshot v{snapshot.VERSAO_SCHEMA} gravado em {destino} ({processos} processos)')
+
+if __name__ == "__main__":
+    main()
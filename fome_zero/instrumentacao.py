@@ -0,0 +1,221 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Desligada por padrão; FOME_ZERO_INSTRUMENTACAO=1 liga a medição das etapas,
+# os logs estruturados e o painel de depuração na sidebar.
+VARIAVEL_AMBIENTE = 'FOME_ZERO_INSTRUMENTACAO'
+LIMITES_HISTOGRAMA = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger(__name__)
+# Logger pai de todos os módulos do pacote; recebe um handler próprio quando a
+# instrumentação é ligada, senão as mensagens INFO seriam descartadas.
+logger_pacote = logging.getLogger('fome_zero')
+
+_ativa = os.environ.get(VARIAVEL_AMBIENTE, '') not in ('', '0')
+_handler_logs = None
+_trava = threading.Lock()
+_histogramas = {}
+_caches = {}
+# Etapas em andamento e registros da execução atual do script; o Streamlit roda
+# cada sessão na sua própria thread.
+_local = threading.local()
+
+def instrumentacao_ativa():
+    return _ativa
+
+def configurar_logs():
+    # Uma linha JSON por evento no stderr, no nível INFO.
+    global _handler_logs
+    if _handler_logs is None:
+        _handler_logs = logging.StreamHandler()
+        _handler_logs.setFormatter(logging.Formatter('%(message)s'))
+        logger_pacote.addHandler(_handler_logs)
+    logger_pacote.setLevel(logging.INFO)
+
+def ativar_instrumentacao(ativa=True):
+    global _ativa
+    _ativa = ativa
+    if ativa:
+        configurar_logs()
+
+# =========================
+# Módulo: Medição de Etapas
+# =========================
+
+def pilha_etapas():
+    if not hasattr(_local, 'pilha'):
+        _local.pilha = []
+    return _local.pilha
+
+@contextmanager
+def medir_etapa(etapa):
+    # Etapas aninhadas são registradas pelo caminho completo
+    # (ex.: 'dados.pipeline_dados/dados.carregar_dados').
+    if not _ativa:
+        yield
+        return
+    pilha = pilha_etapas()
+    pilha.append(etapa)
+    caminho = '/'.join(pilha)
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        pilha.pop()
+        registrar_tempo(caminho, time.perf_counter() - inicio)
+
+def cronometrar(etapa=None):
+    # Decorador; sem nome explícito, a etapa é '<arquivo>.<função>'.
+    def decorador(funcao):
+        nome = etapa or '{}.{}'.format(
+            os.path.splitext(os.path.basename(funcao.__code__.co_filename))[0], funcao.__name__
+        )
+
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            if not _ativa:
+                return funcao(*args, **kwargs)
+            with medir_etapa(nome):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
+
+def registrar_tempo(etapa, segundos):
+    with _trava:
+        histograma = _histogramas.setdefault(
+            etapa, {'contagem': 0, 'soma': 0.0, 'buckets': [0] * len(LIMITES_HISTOGRAMA)}
+        )
+        histograma['contagem'] += 1
+        histograma['soma'] += segundos
+        for posicao, limite in enumerate(LIMITES_HISTOGRAMA):
+            if segundos <= limite:
+                histograma['buckets'][posicao] += 1
+    registros_execucao().append((etapa, segundos))
+    logger.info(json.dumps({'evento': 'etapa', 'etapa': etapa, 'segundos': round(segundos, 6)}))
+
+if _ativa:
+    configurar_logs()
+
+# =========================
+# Módulo: Execução Atual
+# =========================
+
+def iniciar_execucao():
+    _local.registros = []
+    _local.pilha = []
+    _local.inicio = time.perf_counter()
+
+def registros_execucao():
+    if not hasattr(_local, 'registros'):
+        iniciar_execucao()
+    return _local.registros
+
+def duracao_execucao():
+    return time.perf_counter() - getattr(_local, 'inicio', time.perf_counter())
+
+def contexto_execucao():
+    # Para tarefas enviadas a outras threads: as etapas medidas lá entram nos
+    # registros desta execução, sob a etapa em andamento.
+    return registros_execucao(), list(pilha_etapas())
+
+def executar_no_contexto(contexto, funcao, *args):
+    registros, pilha = contexto
+    _local.registros, _local.pilha = registros, list(pilha)
+    try:
+        return funcao(*args)
+    finally:
+        del _local.registros, _local.pilha
+
+# =========================
+# Módulo: Caches e Exportação
+# =========================
+
+def registrar_cache(nome, estatisticas):
+    # estatisticas: função que devolve um dict com 'acertos', 'falhas' e,
+    # opcionalmente, 'itens' e 'bytes' (ver CacheLRU.estatisticas).
+    with _trava:
+        _caches[nome] = estatisticas
+
+def estatisticas_caches():
+    with _trava:
+        caches = dict(_caches)
+    return {nome: estatisticas() for nome, estatisticas in sorted(caches.items())}
+
+def formatar_rotulos(**rotulos):
+    pares = ','.join(
+        '{}="{}"'.format(nome, str(valor).replace('\\', '\\\\').replace('"', '\\"'))
+        for nome, valor in rotulos.items()
+    )
+    return '{' + pares + '}'
+
+def metricas_prometheus():
+    # Formato de exposição de texto do Prometheus.
+    with _trava:
+        histogramas = {etapa: {**dados, 'buckets': list(dados['buckets'])} for etapa, dados in _histogramas.items()}
+    linhas = [
+        '# HELP fome_zero_etapa_segundos Tempo gasto em cada etapa instrumentada.',
+        '# TYPE fome_zero_etapa_segundos histogram',
+    ]
+    for etapa, dados in sorted(histogramas.items()):
+        for limite, quantidade in zip(LIMITES_HISTOGRAMA, dados['buckets']):
+            linhas.append(f"fome_zero_etapa_segundos_bucket{formatar_rotulos(etapa=etapa, le=limite)} {quantidade}")
+        linhas.append(f"fome_zero_etapa_segundos_bucket{formatar_rotulos(etapa=etapa, le='+Inf')} {dados['contagem']}")
+        linhas.append(f"fome_zero_etapa_segundos_sum{formatar_rotulos(etapa=etapa)} {dados['soma']:.6f}")
+        linhas.append(f"fome_zero_etapa_segundos_count{formatar_rotulos(etapa=etapa)} {dados['contagem']}")
+
+    caches = estatisticas_caches()
+    metricas_cache = [
+        ('acertos', 'counter', 'fome_zero_cache_acertos_total', 'Consultas atendidas pelo cache.'),
+        ('falhas', 'counter', 'fome_zero_cache_falhas_total', 'Consultas que precisaram construir o valor.'),
+        ('itens', 'gauge', 'fome_zero_cache_itens', 'Itens guardados no cache.'),
+        ('bytes', 'gauge', 'fome_zero_cache_bytes', 'Bytes ocupados pelo cache.'),
+    ]
+    for chave, tipo, nome_metrica, ajuda in metricas_cache:
+        valores = [(nome, estatisticas[chave]) for nome, estatisticas in caches.items() if chave in estatisticas]
+        if not valores:
+            continue
+        linhas.append(f'# HELP {nome_metrica} {ajuda}')
+        linhas.append(f'# TYPE {nome_metrica} {tipo}')
+        for nome, valor in valores:
+            linhas.append(f'{nome_metrica}{formatar_rotulos(cache=nome)} {valor}')
+    return '\n'.join(linhas) + '\n'
+
+def limpar_metricas():
+    with _trava:
+        _histogramas.clear()
+
+# =========================
+# Módulo: Painel de Depuração
+# =========================
+
+def exibir_painel_instrumentacao():
+    if not _ativa:
+        return
+    import pandas as pd
+    import streamlit as st
+
+    registros = pd.DataFrame(registros_execucao(), columns=['etapa', 'segundos'])
+    with st.sidebar.expander("Instrumentação", expanded=False):
+        st.caption(f"Execução atual: {duracao_execucao():.3f} s")
+        if not registros.empty:
+            resumo = (
+                registros.groupby('etapa', sort=False)['segundos']
+                .agg(['count', 'sum'])
+                .rename(columns={'count': 'chamadas', 'sum': 'segundos'})
+            )
+            st.dataframe(resumo.style.format({'segundos': '{:.4f}'}), use_container_width=True)
+        caches = estatisticas_caches()
+        if caches:
+            st.markdown("**Caches**")
+            st.dataframe(pd.DataFrame(caches).T, use_container_width=True)
+        st.download_button(
+            label="Baixar métricas (Prometheus)",
+            data=metricas_prometheus(),
+            file_name="metricas.prom",
+            mime="text/plain"
+        )
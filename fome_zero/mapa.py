@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+import folium
+
+from fome_zero.cache import CacheLRU
+from fome_zero.espacial import obter_indice_espacial, posicoes_no_retangulo
+from fome_zero.filtros import VisaoFiltrada
+from fome_zero.instrumentacao import cronometrar, registrar_cache
+
+# Grade grossa usada enquanto o mapa ainda não devolveu os limites visíveis.
+TAMANHO_CELULA_GRADE = 1.0
+LIMITE_BYTES_CACHE_MAPAS = 64 * 1024 * 1024
+
+# Modo progressivo: no máximo este número de restaurantes visíveis é desenhado
+# ponto a ponto; acima dele a área visível é agregada numa grade de até
+# CELULAS_POR_LADO_VIEWPORT × CELULAS_POR_LADO_VIEWPORT células.
+ORCAMENTO_PONTOS_VIEWPORT = 500
+CELULAS_POR_LADO_VIEWPORT = 20
+MUNDO_INTEIRO = (-90.0, -180.0, 90.0, 180.0)
+
+# =========================
+# Módulo: Preparação dos Pontos
+# =========================
+
+def textos_popup(df):
+    # Nome, nota e culinária de cada restaurante, montados para a coluna inteira.
+    textos = pd.Series('', index=df.index, dtype=object)
+    partes = [('restaurant_name', ''), ('aggregate_rating', '<br>Nota: '), ('cuisines', '<br>Tipo de culinária: ')]
+    for coluna, prefixo in partes:
+        if coluna in df.columns:
+            valores = df[coluna]
+            textos = textos + (prefixo + valores.astype(str)).where(valores.notna(), '')
+    return textos
+
+def cores_marcadores(df):
+    cores = df['rating_color'].astype(str)
+    return cores.where(cores.str.startswith('#'), '#' + cores)
+
+# =========================
+# Módulo: Camadas do Mapa
+# =========================
+
+# O conteúdo de uma camada fica em tabelas simples (uma linha por marcador),
+# que podem ser guardadas em cache e compartilhadas entre sessões; os objetos
+# do folium são montados a partir delas a cada rerun, já que o st_folium altera
+# a camada que recebe (id, mapa pai).
+
+def tabela_marcadores(df_mapa):
+    return pd.DataFrame({
+        'latitude': df_mapa['latitude'].to_numpy(),
+        'longitude': df_mapa['longitude'].to_numpy(),
+        'cor': cores_marcadores(df_mapa).to_numpy(),
+        'popup': textos_popup(df_mapa).to_numpy(),
+    })
+
+def agregar_em_grade(df_mapa, tamanho_celula=TAMANHO_CELULA_GRADE):
+    celulas = pd.DataFrame({
+        'linha': np.floor(df_mapa['latitude'].to_numpy() / tamanho_celula),
+        'coluna': np.floor(df_mapa['longitude'].to_numpy() / tamanho_celula),
+        'latitude': df_mapa['latitude'].to_numpy(),
+        'longitude': df_mapa['longitude'].to_numpy(),
+        'aggregate_rating': df_mapa['aggregate_rating'].to_numpy(),
+    })
+    return (
+        celulas.groupby(['linha', 'coluna'])
+        .agg(
+            latitude=('latitude', 'mean'),
+            longitude=('longitude', 'mean'),
+            restaurantes=('aggregate_rating', 'size'),
+            nota_media=('aggregate_rating', 'mean'),
+        )
+        .reset_index(drop=True)
+    )
+
+def adicionar_marcadores(camada, marcadores):
+    for marcador in marcadores.itertuples(index=False):
+        folium.CircleMarker(
+            location=[marcador.latitude, marcador.longitude],
+            radius=4,
+            popup=folium.Popup(marcador.popup, max_width=250) if marcador.popup else None,
+            color=marcador.cor,
+            fill=True,
+            fill_color=marcador.cor,
+            fill_opacity=0.7
+        ).add_to(camada)
+
+def adicionar_grade(camada, grade):
+    raios = 4 + 3 * np.log10(grade['restaurantes'].to_numpy())
+    for celula, raio in zip(grade.itertuples(index=False), raios):
+        folium.CircleMarker(
+            location=[celula.latitude, celula.longitude],
+            radius=float(raio),
+            popup=folium.Popup(f"{celula.restaurantes} restaurantes<br>Nota média: {celula.nota_media:.2f}", max_width=250),
+            color='#3F7E00',
+            fill=True,
+            fill_opacity=0.5
+        ).add_to(camada)
+
+# =========================
+# Módulo: Mapa Progressivo
+# =========================
+
+# O mapa base só tem o fundo, centrado na seleção; enquanto ele não muda, o
+# st_folium não remonta o mapa no navegador e apenas troca a camada de
+# restaurantes, montada a partir dos limites visíveis devolvidos no rerun
+# anterior. Sem limites ainda, a camada é a grade grossa da seleção inteira.
+
+def limites_do_retorno(retorno):
+    # retorno: valor devolvido pelo st_folium -> (sul, oeste, norte, leste) ou None.
+    try:
+        sudoeste, nordeste = retorno['bounds']['_southWest'], retorno['bounds']['_northEast']
+        limites = (sudoeste['lat'], sudoeste['lng'], nordeste['lat'], nordeste['lng'])
+    except (KeyError, TypeError):
+        return None
+    if any(valor is None for valor in limites):
+        return None
+    return tuple(float(valor) for valor in limites)
+
+def construir_mapa_base(df_filtrado):
+    # Montado a cada rerun: o st_folium acrescenta a camada ao mapa recebido.
+    return folium.Map(location=[df_filtrado['latitude'].mean(), df_filtrado['longitude'].mean()], zoom_start=2)
+
+def selecionar_visiveis(df_filtrado, limites):
+    # df_filtrado: VisaoFiltrada sobre o dataset compartilhado (ver filtros.filtrar).
+    visiveis = posicoes_no_retangulo(obter_indice_espacial(), *limites)
+    return VisaoFiltrada(df_filtrado.base, np.intersect1d(df_filtrado.posicoes, visiveis, assume_unique=True))
+
+def tamanho_celula_viewport(limites):
+    # O Leaflet devolve leste >= oeste, com longitudes fora de [-180, 180)
+    # quando o mapa mostra mais de uma volta; a largura útil vai até 360.
+    sul, oeste, norte, leste = limites
+    largura = min(leste - oeste, 360)
+    return max(norte - sul, largura) / CELULAS_POR_LADO_VIEWPORT
+
+@cronometrar()
+def conteudo_camada(df_visivel, tamanho_celula):
+    # ('marcadores', tabela) com até ORCAMENTO_PONTOS_VIEWPORT restaurantes
+    # visíveis; acima disso ('grade', células).
+    if len(df_visivel) <= ORCAMENTO_PONTOS_VIEWPORT:
+        return 'marcadores', tabela_marcadores(df_visivel)
+    return 'grade', agregar_em_grade(df_visivel, tamanho_celula)
+
+@cronometrar()
+def montar_camada(conteudo):
+    # Uma camada nova por rerun, nunca compartilhada entre sessões.
+    tipo, tabela = conteudo
+    camada = folium.FeatureGroup(name='Restaurantes')
+    if tipo == 'marcadores':
+        adicionar_marcadores(camada, tabela)
+    else:
+        adicionar_grade(camada, tabela)
+    return camada
+
+# =========================
+# Módulo: Cache de Camadas
+# =========================
+
+def tamanho_conteudo(conteudo):
+    return int(conteudo[1].memory_usage(deep=True).sum())
+
+_cache_camadas = CacheLRU(LIMITE_BYTES_CACHE_MAPAS, medir_tamanho=tamanho_conteudo)
+registrar_cache('camadas_mapa', _cache_camadas.estatisticas)
+
+def obter_camada(df_filtrado, chave_filtros, limites=None):
+    # Limites arredondados na chave: reruns causados por outros widgets, sem
+    # mexer no mapa, reaproveitam o conteúdo da camada.
+    if limites is None:
+        chave = (chave_filtros, None)
+        construir = lambda: conteudo_camada(selecionar_visiveis(df_filtrado, MUNDO_INTEIRO), TAMANHO_CELULA_GRADE)
+    else:
+        chave = (chave_filtros, tuple(round(valor, 3) for valor in limites))
+        construir = lambda: conteudo_camada(selecionar_visiveis(df_filtrado, limites), tamanho_celula_viewport(limites))
+    return montar_camada(_cache_camadas.obter(chave, construir))
+
+def estatisticas_cache_camadas():
+    return _cache_camadas.estatisticas()
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from fome_zero.dados import obter_estrutura
+from fome_zero.culinarias import obter_indice_culinarias, mascara_culinaria
+from fome_zero.instrumentacao import cronometrar
+
+# =========================
+# Módulo: Índices de Ranking
+# =========================
+
+# Ordem dos rankings: maior nota primeiro; empates decididos pelo maior número
+# de votos e, por fim, pelo menor restaurant_id, para o resultado ser determinístico.
+
+def ordenar_posicoes(ranking, posicoes):
+    chaves = (ranking['ids'][posicoes], -ranking['votos'][posicoes], -ranking['notas'][posicoes])
+    return posicoes[np.lexsort(chaves)]
+
+@cronometrar()
+def construir_ranking(df, mascara=None):
+    ranking = {
+        'df': df,
+        'notas': df['aggregate_rating'].to_numpy(dtype=float),
+        'votos': df['votes'].to_numpy(dtype=float),
+        'ids': df['restaurant_id'].to_numpy(),
+    }
+    posicoes = np.arange(len(df)) if mascara is None else np.flatnonzero(mascara)
+    ordem = ordenar_posicoes(ranking, posicoes)
+    # Separa a ordem global por país mantendo a ordenação dentro de cada grupo.
+    paises = df['country'].to_numpy()[ordem]
+    agrupamento = pd.Series(ordem).groupby(paises, sort=False)
+    ranking['por_pais'] = {pais: grupo.to_numpy() for pais, grupo in agrupamento}
+    return ranking
+
+def obter_ranking():
+    return obter_estrutura('ranking', construir_ranking)
+
+def obter_ranking_culinaria(culinaria):
+    # Restaurantes que servem a culinária em qualquer posição da sua lista,
+    # resolvidos pelo índice de culinárias.
+    return obter_estrutura(
+        f'ranking_culinaria:{culinaria.lower()}',
+        lambda df: construir_ranking(df, mascara_culinaria(obter_indice_culinarias(), culinaria, len(df)))
+    )
+
+# =========================
+# Módulo: Consultas Top-K
+# =========================
+
+def filtrar_ranking(ranking, paises_selecionados):
+    por_pais = ranking['por_pais']
+    return {**ranking, 'por_pais': {pais: por_pais[pais] for pais in paises_selecionados if pais in por_pais}}
+
+def top_k(ranking, k):
+    # Cada país contribui com no máximo k candidatos já ordenados; só esses
+    # k × países candidatos são reordenados para o resultado final.
+    listas = [posicoes[:k] for posicoes in ranking['por_pais'].values()]
+    if not listas:
+        return ranking['df'].iloc[0:0]
+    candidatos = ordenar_posicoes(ranking, np.concatenate(listas))
+    return ranking['df'].iloc[candidatos[:k]]
@@ -0,0 +1,124 @@
+import argparse
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from fome_zero.consultas import CONSULTAS, ConsultaInvalida, responder, responder_lote
+from fome_zero.instrumentacao import metricas_prometheus
+
+HOST_PADRAO = '127.0.0.1'
+PORTA_PADRAO = 8600
+LIMITE_CORPO_BYTES = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Módulo: Rotas
+# =========================
+
+# GET  /consultas                    -> nomes das consultas e parâmetros aceitos
+# GET  /consultas/<nome>?paises=...  -> uma consulta, parâmetros na URL
+# POST /consultas                    -> {"consulta": ..., "parametros": {...}} ou uma lista deles (lote)
+# GET  /metrics                      -> métricas no formato do Prometheus
+
+def pedido_da_url(nome, query):
+    # Parâmetros repetidos viram lista: ?paises=India&paises=Brazil.
+    parametros = {chave: valores if len(valores) > 1 else valores[0] for chave, valores in parse_qs(query).items()}
+    return {'consulta': nome, 'parametros': parametros}
+
+class ManipuladorConsultas(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def enviar(self, status, corpo, tipo='application/json; charset=utf-8'):
+        self.send_response(status)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def enviar_erro(self, status, mensagem):
+        self.enviar(status, json.dumps({'erro': mensagem}, ensure_ascii=False).encode('utf-8'))
+
+    def enviar_consulta(self, calcular):
+        # Pedido inválido -> 400; qualquer outra falha da consulta -> 500, com o
+        # traceback no log, em vez de derrubar a conexão sem resposta.
+        try:
+            corpo = calcular()
+        except ConsultaInvalida as erro:
+            self.enviar_erro(400, str(erro))
+        except Exception:
+            logger.exception("Falha ao executar a consulta (%s %s)", self.command, self.path)
+            self.enviar_erro(500, "Erro interno ao executar a consulta.")
+        else:
+            self.enviar(200, corpo)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        partes = [parte for parte in url.path.split('/') if parte]
+        if partes == ['metrics']:
+            self.enviar(200, metricas_prometheus().encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8')
+        elif partes == ['consultas']:
+            catalogo = {nome: list(parametros) for nome, (_, parametros) in CONSULTAS.items()}
+            self.enviar(200, json.dumps(catalogo).encode('utf-8'))
+        elif len(partes) == 2 and partes[0] == 'consultas':
+            self.enviar_consulta(lambda: responder(pedido_da_url(partes[1], url.query)))
+        else:
+            self.enviar_erro(404, "Rota não encontrada.")
+
+    def do_POST(self):
+        if urlsplit(self.path).path.rstrip('/') != '/consultas':
+            self.enviar_erro(404, "Rota não encontrada.")
+            return
+        # Sem um tamanho válido o corpo não pode ser lido nem descartado, então a
+        # conexão é fechada depois da resposta de erro.
+        tamanho = self.headers.get('Content-Length') or '0'
+        if not (tamanho.isascii() and tamanho.isdigit()):
+            self.close_connection = True
+            self.enviar_erro(400, "Content-Length inválido.")
+            return
+        tamanho = int(tamanho)
+        if tamanho > LIMITE_CORPO_BYTES:
+            self.close_connection = True
+            self.enviar_erro(413, "Corpo da requisição grande demais.")
+            return
+        try:
+            corpo = json.loads(self.rfile.read(tamanho) or b'null')
+        except ValueError:
+            self.enviar_erro(400, "Corpo não é um JSON válido.")
+            return
+        if isinstance(corpo, list):
+            self.enviar_consulta(lambda: responder_lote(corpo))
+        else:
+            self.enviar_consulta(lambda: responder(corpo))
+
+    def log_message(self, formato, *args):
+        # Sem log por requisição no stderr; a instrumentação cobre os tempos.
+        pass
+
+# =========================
+# Módulo: Linha de Comando
+# =========================
+
+def criar_servidor(host=HOST_PADRAO, porta=PORTA_PADRAO):
+    return ThreadingHTTPServer((host, porta), ManipuladorConsultas)
+
+def ler_argumentos(argumentos):
+    parser = argparse.ArgumentParser(description="API HTTP/JSON com as métricas do painel Fome Zero.")
+    parser.add_argument('--host', default=HOST_PADRAO)
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    return parser.parse_args(argumentos)
+
+def main(argumentos=None):
+    opcoes = ler_argumentos(argumentos)
+    servidor = criar_servidor(opcoes.host, opcoes.porta)
+    print(f'Servindo consultas em http://{opcoes.host}:{opcoes.porta}/consultas')
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from fome_zero.dados import CAMINHO_PADRAO, TIPOS_COLUNAS_CSV
+
+TAMANHO_BLOCO_PADRAO = 200_000
+TAXA_DUPLICADOS_PADRAO = 0.0
+FORMATOS_SAIDA = ('csv', 'parquet')
+
+# Ruído aplicado sobre as linhas reais: votos variam por um fator log-normal e as
+# coordenadas são deslocadas numa fração da dispersão da própria cidade.
+DESVIO_LOG_VOTOS = 0.3
+FRACAO_DISPERSAO_CIDADE = 0.1
+DESLOCAMENTO_MINIMO = 0.0005
+DESLOCAMENTO_MAXIMO = 0.01
+
+# =========================
+# Módulo: Perfil dos Dados Reais
+# =========================
+
+def construir_perfil(caminho_arquivo=CAMINHO_PADRAO):
+    # O perfil guarda as linhas reais (sem duplicados) agrupadas por país. Cada
+    # linha sintética parte de uma linha real do mesmo país, então cidade,
+    # culinárias, nota, cor, texto da nota no idioma local e custo continuam
+    # coerentes entre si, com as mesmas frequências do país de origem.
+    base = pd.read_csv(caminho_arquivo, dtype=TIPOS_COLUNAS_CSV)
+    base = base.drop_duplicates('Restaurant ID').reset_index(drop=True)
+
+    dispersao = base.groupby('City')[['Latitude', 'Longitude']].transform('std').fillna(0).to_numpy()
+    deslocamento = np.clip(dispersao * FRACAO_DISPERSAO_CIDADE, DESLOCAMENTO_MINIMO, DESLOCAMENTO_MAXIMO)
+    # Linhas sem coordenadas (0, 0) continuam sem coordenadas.
+    deslocamento[(base['Latitude'] == 0) & (base['Longitude'] == 0)] = 0
+
+    posicoes_por_pais = base.groupby('Country Code').indices
+    quantidades = pd.Series({pais: len(posicoes) for pais, posicoes in posicoes_por_pais.items()})
+    return {
+        'base': base,
+        'deslocamento': deslocamento,
+        'posicoes_por_pais': posicoes_por_pais,
+        'pesos_paises': quantidades / quantidades.sum(),
+    }
+
+def pesos_normalizados(perfil, pesos_paises=None):
+    # pesos_paises permite mudar a mistura de países (ex.: {1: 0.9, 216: 0.1});
+    # sem ele, vale a proporção dos dados reais.
+    if pesos_paises is None:
+        return perfil['pesos_paises']
+    pesos = pd.Series(pesos_paises, dtype=float)
+    desconhecidos = set(pesos.index) - set(perfil['posicoes_por_pais'])
+    if desconhecidos:
+        raise ValueError(f"Códigos de país sem dados reais: {sorted(desconhecidos)}")
+    return pesos / pesos.sum()
+
+# =========================
+# Módulo: Geração em Blocos
+# =========================
+
+def amostrar_posicoes(perfil, pesos, quantidade, rng):
+    contagens = rng.multinomial(quantidade, pesos.to_numpy())
+    posicoes = np.concatenate([
+        rng.choice(perfil['posicoes_por_pais'][pais], contagem)
+        for pais, contagem in zip(pesos.index, contagens) if contagem
+    ])
+    rng.shuffle(posicoes)
+    return posicoes
+
+def inserir_duplicados(bloco, taxa_duplicados, rng):
+    # Uma fração das linhas vira cópia exata de uma linha anterior do mesmo bloco,
+    # como as repetições do zomato.csv original.
+    if taxa_duplicados <= 0 or len(bloco) < 2:
+        return bloco
+    repetidas = rng.random(len(bloco)) < taxa_duplicados
+    repetidas[0] = False
+    copias = np.flatnonzero(repetidas)
+    if not len(copias):
+        return bloco
+    # A origem de cada cópia é sorteada entre as linhas originais anteriores a ela.
+    originais = np.flatnonzero(~repetidas)
+    anteriores = np.searchsorted(originais, copias)
+    origens = originais[(rng.random(len(copias)) * anteriores).astype(np.intp)]
+    for coluna in bloco.columns:
+        valores = bloco[coluna].to_numpy(copy=True)
+        valores[copias] = valores[origens]
+        bloco[coluna] = valores
+    return bloco
+
+def gerar_bloco(perfil, pesos, inicio, quantidade, taxa_duplicados, rng):
+    posicoes = amostrar_posicoes(perfil, pesos, quantidade, rng)
+    bloco = perfil['base'].take(posicoes).reset_index(drop=True)
+    bloco['Restaurant ID'] = np.arange(inicio + 1, inicio + quantidade + 1)
+
+    votos = bloco['Votes'].to_numpy() * rng.lognormal(0, DESVIO_LOG_VOTOS, quantidade)
+    bloco['Votes'] = np.rint(votos).astype('int64')
+    deslocamento = perfil['deslocamento'][posicoes]
+    bloco['Latitude'] += rng.normal(0, 1, quantidade) * deslocamento[:, 0]
+    bloco['Longitude'] += rng.normal(0, 1, quantidade) * deslocamento[:, 1]
+    return inserir_duplicados(bloco, taxa_duplicados, rng)
+
+def gerar_blocos(num_linhas, perfil=None, tamanho_bloco=TAMANHO_BLOCO_PADRAO,
+                 taxa_duplicados=TAXA_DUPLICADOS_PADRAO, pesos_paises=None, semente=0):
+    if not 0 <= taxa_duplicados < 1:
+        raise ValueError("taxa_duplicados deve estar em [0, 1).")
+    perfil = perfil or construir_perfil()
+    pesos = pesos_normalizados(perfil, pesos_paises)
+    rng = np.random.default_rng(semente)
+    for inicio in range(0, num_linhas, tamanho_bloco):
+        quantidade = min(tamanho_bloco, num_linhas - inicio)
+        yield gerar_bloco(perfil, pesos, inicio, quantidade, taxa_duplicados, rng)
+
+# =========================
+# Módulo: Escrita em Fluxo
+# =========================
+
+def escrever_csv(blocos, caminho_arquivo):
+    with open(caminho_arquivo, 'w', encoding='utf-8', newline='') as arquivo:
+        for numero, bloco in enumerate(blocos):
+            bloco.to_csv(arquivo, header=numero == 0, index=False)
+
+def escrever_parquet(blocos, caminho_arquivo):
+    escritor = None
+    try:
+        for bloco in blocos:
+            tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+            if escritor is None:
+                escritor = pq.ParquetWriter(caminho_arquivo, tabela.schema)
+            escritor.write_table(tabela)
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+def gerar_arquivo(caminho_arquivo, num_linhas, formato=None, **opcoes):
+    # Só um bloco fica em memória por vez, então o tamanho da saída não é
+    # limitado pela memória disponível.
+    formato = formato or ('parquet' if caminho_arquivo.endswith('.parquet') else 'csv')
+    if formato not in FORMATOS_SAIDA:
+        raise ValueError(f"Formato inválido: {formato!r}. Use um de {FORMATOS_SAIDA}.")
+    escrever = escrever_parquet if formato == 'parquet' else escrever_csv
+    escrever(gerar_blocos(num_linhas, **opcoes), caminho_arquivo)
+    return caminho_arquivo
+
+# =========================
+# Módulo: Linha de Comando
+# =========================
+
+def ler_argumentos(argumentos):
+    parser = argparse.ArgumentParser(description="Gera datasets sintéticos com o schema do zomato.csv.")
+    parser.add_argument('destino')
+    parser.add_argument('linhas', type=int)
+    parser.add_argument('--formato', choices=FORMATOS_SAIDA)
+    parser.add_argument('--origem', default=CAMINHO_PADRAO)
+    parser.add_argument('--duplicados', type=float, default=TAXA_DUPLICADOS_PADRAO)
+    parser.add_argument('--bloco', type=int, default=TAMANHO_BLOCO_PADRAO)
+    parser.add_argument('--semente', type=int, default=0)
+    return parser.parse_args(argumentos)
+
+def main(argumentos=None):
+    opcoes = ler_argumentos(argumentos)
+    destino = gerar_arquivo(
+        opcoes.destino, opcoes.linhas, opcoes.formato,
+        perfil=construir_perfil(opcoes.origem), tamanho_bloco=opcoes.bloco,
+        taxa_duplicados=opcoes.duplicados, semente=opcoes.semente,
+    )
+    print(f'{opcoes.linhas} linhas gravadas em {os.path.abspath(destino)}')
+
+if __name__ == "__main__":
+    main()
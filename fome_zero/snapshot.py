@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from fome_zero.instrumentacao import cronometrar
+
+# Incrementar sempre que a saída de pipeline_dados mudar (colunas, tipos ou regras),
+# para que snapshots antigos sejam descartados e reconstruídos.
+VERSAO_SCHEMA = 6
+
+CHAVE_METADADOS = b'fome_zero'
+
+# =========================
+# Módulo: Identificação da Origem
+# =========================
+
+def caminho_snapshot(caminho_csv):
+    return os.path.splitext(caminho_csv)[0] + '.parquet'
+
+def hash_arquivo(caminho_arquivo, tamanho_bloco=1 << 20):
+    sha = hashlib.sha256()
+    with open(caminho_arquivo, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+def descrever_origem(caminho_csv, politica_duplicados, completo=True):
+    # completo: o arquivo tem todas as colunas do pipeline, não só uma projeção;
+    # politica_duplicados: a política de dados.remover_duplicados usada na geração.
+    info = os.stat(caminho_csv)
+    return {
+        'versao_schema': VERSAO_SCHEMA,
+        'completo': completo,
+        'politica_duplicados': politica_duplicados,
+        'tamanho': info.st_size,
+        'mtime_ns': info.st_mtime_ns,
+        'sha256': hash_arquivo(caminho_csv),
+    }
+
+def origem_confere(metadados, caminho_csv, politica_duplicados):
+    # O mtime muda ao copiar o CSV para outro container; nesse caso o conteúdo
+    # é conferido pelo hash antes de descartar o snapshot.
+    if metadados.get('versao_schema') != VERSAO_SCHEMA:
+        return False
+    if metadados.get('politica_duplicados') != politica_duplicados:
+        return False
+    info = os.stat(caminho_csv)
+    if metadados.get('tamanho') != info.st_size:
+        return False
+    if metadados.get('mtime_ns') == info.st_mtime_ns:
+        return True
+    return metadados.get('sha256') == hash_arquivo(caminho_csv)
+
+# =========================
+# Módulo: Leitura e Escrita
+# =========================
+
+def metadados_schema(schema):
+    metadados = schema.metadata or {}
+    if CHAVE_METADADOS not in metadados:
+        return {}
+    return json.loads(metadados[CHAVE_METADADOS])
+
+def ler_metadados(caminho_parquet):
+    return metadados_schema(pq.read_schema(caminho_parquet))
+
+def selecionar_colunas(nomes, metadados, colunas):
+    # Colunas a ler, na ordem do arquivo (a mesma que o pipeline produz), ou
+    # None quando o arquivo não as tem. colunas=None pede todas as colunas
+    # tratadas, então só serve um arquivo gravado completo.
+    if colunas is None:
+        return list(nomes) if metadados.get('completo') else None
+    if not set(colunas) <= set(nomes):
+        return None
+    return [nome for nome in nomes if nome in colunas]
+
+@cronometrar()
+def salvar_snapshot(df, caminho_parquet, caminho_csv, politica_duplicados, completo=True):
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    metadados = dict(tabela.schema.metadata or {})
+    origem = descrever_origem(caminho_csv, politica_duplicados, completo)
+    metadados[CHAVE_METADADOS] = json.dumps(origem).encode('utf-8')
+    tabela = tabela.replace_schema_metadata(metadados)
+    # Grava em arquivo temporário e renomeia, para que outra réplica nunca leia
+    # um snapshot pela metade.
+    caminho_temporario = f'{caminho_parquet}.{os.getpid()}.tmp'
+    pq.write_table(tabela, caminho_temporario)
+    os.replace(caminho_temporario, caminho_parquet)
+
+def normalizar_schema(schema):
+    # Blocos diferentes geram dicionários com índices de larguras diferentes
+    # (int8, int16...); todos são gravados como int32 para o schema ser único.
+    campos = [
+        pa.field(campo.name, pa.dictionary(pa.int32(), campo.type.value_type))
+        if pa.types.is_dictionary(campo.type) else campo
+        for campo in schema
+    ]
+    return pa.schema(campos, metadata=schema.metadata)
+
+def salvar_snapshot_em_blocos(blocos, caminho_parquet, caminho_csv, politica_duplicados):
+    caminho_temporario = f'{caminho_parquet}.{os.getpid()}.tmp'
+    escritor = None
+    try:
+        for bloco in blocos:
+            tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+            if escritor is None:
+                metadados = dict(tabela.schema.metadata or {})
+                metadados[CHAVE_METADADOS] = json.dumps(descrever_origem(caminho_csv, politica_duplicados)).encode('utf-8')
+                schema = normalizar_schema(tabela.schema).with_metadata(metadados)
+                escritor = pq.ParquetWriter(caminho_temporario, schema)
+            escritor.write_table(tabela.cast(schema))
+    finally:
+        if escritor is not None:
+            escritor.close()
+    if escritor is not None:
+        os.replace(caminho_temporario, caminho_parquet)
+
+@cronometrar()
+def ler_snapshot(caminho_parquet, caminho_csv, politica_duplicados, colunas=None, ids=None):
+    # ids: lê só as linhas desses restaurant_id; o filtro é aplicado na leitura,
+    # sem carregar as demais linhas.
+    if not os.path.exists(caminho_parquet):
+        return None
+    try:
+        schema = pq.read_schema(caminho_parquet)
+        metadados = metadados_schema(schema)
+        colunas = selecionar_colunas(schema.names, metadados, colunas)
+        if colunas is None or not origem_confere(metadados, caminho_csv, politica_duplicados):
+            return None
+        filtros = None if ids is None else [('restaurant_id', 'in', ids)]
+        tabela = pq.read_table(caminho_parquet, columns=colunas, filters=filtros, memory_map=True)
+    except (OSError, ValueError, pa.ArrowException):
+        return None
+    return ordenar_categorias(tabela.to_pandas(split_blocks=True, self_destruct=True))
+
+def ordenar_categorias(df):
+    # Snapshots gravados em blocos unificam os dicionários na ordem em que os
+    # valores aparecem; as páginas contam com categorias em ordem alfabética.
+    for coluna in df.select_dtypes('category').columns:
+        categorias = df[coluna].cat.categories
+        if not categorias.is_monotonic_increasing:
+            df[coluna] = df[coluna].cat.reorder_categories(categorias.sort_values())
+    return df
+
+# =========================
+# Módulo: Arquivo Compartilhado
+# =========================
+
+# Cópia do dataset tratado em Arrow IPC sem compressão, aberta com mmap. As
+# colunas do DataFrame apontam direto para as páginas do arquivo, que o sistema
+# operacional mantém uma vez só no page cache e compartilha entre todos os
+# processos que o abrem; cada processo guarda apenas as categorias e os metadados.
+
+def caminho_compartilhado(caminho_csv):
+    return os.path.splitext(caminho_csv)[0] + '.arrow'
+
+def tipo_pandas_sem_copia(tipo):
+    # Textos viram pd.ArrowDtype, que usa o buffer do Arrow; como object, cada
+    # valor seria copiado para um str do Python.
+    if pa.types.is_string(tipo) or pa.types.is_large_string(tipo):
+        return pd.ArrowDtype(tipo)
+    return None
+
+@cronometrar()
+def salvar_compartilhado(df, caminho_arrow, caminho_csv, politica_duplicados, completo=True, deltas=(), origem=None):
+    # deltas: arquivos de delta já incluídos em df (ver dados.sincronizar_compartilhado);
+    # origem: metadados de um arquivo anterior, para regravar sem recalcular o hash do CSV.
+    # Um único bloco por coluna: com vários, a leitura teria de concatená-los (uma cópia).
+    tabela = pa.Table.from_pandas(df, preserve_index=False).combine_chunks()
+    metadados = dict(tabela.schema.metadata or {})
+    origem = dict(descrever_origem(caminho_csv, politica_duplicados, completo) if origem is None else origem)
+    origem['deltas'] = [list(delta) for delta in deltas]
+    metadados[CHAVE_METADADOS] = json.dumps(origem).encode('utf-8')
+    tabela = tabela.replace_schema_metadata(metadados)
+    # Mesmo cuidado do Parquet: os processos que já mapearam o arquivo antigo
+    # continuam com ele, os novos abrem o arquivo completo.
+    caminho_temporario = f'{caminho_arrow}.{os.getpid()}.tmp'
+    with ipc.new_file(caminho_temporario, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    os.replace(caminho_temporario, caminho_arrow)
+
+@cronometrar()
+def abrir_compartilhado(caminho_arrow, caminho_csv, politica_duplicados, colunas=None):
+    # (DataFrame somente leitura sobre o arquivo mapeado, metadados), ou None
+    # quando o arquivo falta, é de outra origem ou não tem as colunas pedidas.
+    if not os.path.exists(caminho_arrow):
+        return None
+    try:
+        tabela = ipc.open_file(pa.memory_map(caminho_arrow)).read_all()
+        metadados = metadados_schema(tabela.schema)
+        colunas = selecionar_colunas(tabela.column_names, metadados, colunas)
+        if colunas is None or not origem_confere(metadados, caminho_csv, politica_duplicados):
+            return None
+        tabela = tabela.select(colunas)
+    except (OSError, ValueError, pa.ArrowException):
+        return None
+    df = ordenar_categorias(tabela.to_pandas(split_blocks=True, types_mapper=tipo_pandas_sem_copia))
+    return df, metadados
+
+def deltas_publicados(metadados):
+    return [tuple(delta) for delta in metadados.get('deltas', [])]
+
+# =========================
+# Módulo: Etapa de Build
+# =========================
+
+def main(argumentos=None):
+    from fome_zero.dados import CAMINHO_PADRAO, pipeline_dados, politica_duplicados_configurada
+
+    argumentos = sys.argv[1:] if argumentos is None else argumentos
+    caminho_csv = argumentos[0] if argumentos else CAMINHO_PADRAO
+    destino = argumentos[1] if len(argumentos) > 1 else caminho_snapshot(caminho_csv)
+    # Destino .arrow publica o arquivo compartilhado (ver FOME_ZERO_DATASET_COMPARTILHADO).
+    salvar = salvar_compartilhado if destino.endswith('.arrow') else salvar_snapshot
+    politica = politica_duplicados_configurada()
+    salvar(pipeline_dados(caminho_csv, politica), destino, caminho_csv, politica)
+    print(f'Snapshot v{VERSAO_SCHEMA} gravado em {destino}')
+
+if __name__ == "__main__":
+    main()
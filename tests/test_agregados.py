@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fome_zero.agregados import (
+    construir_cubo, construir_cubo_culinarias, construir_histograma_notas, media_custo_por_cidade,
+    media_custo_por_culinaria, restaurantes_nota_abaixo, restaurantes_nota_acima
+)
+from fome_zero.dados import CAMINHO_PADRAO, COLUNAS_PAINEL, pipeline_dados
+
+# Limiares na grade de 0,1 e fora dela, nas bordas e fora da escala de notas.
+LIMIARES = [-1, 0, 0.05, 0.1, 0.3, 1, 2.5, 2.55, 3.3, 3.35, 3.999, 4, 4.05, 4.9, 4.95, 5, 6]
+
+@pytest.fixture(scope='module', params=['zomato', 'sintetico'])
+def df(request):
+    df = pipeline_dados(CAMINHO_PADRAO, colunas=['city', 'country', 'aggregate_rating'])
+    if request.param == 'sintetico':
+        # Notas espalhadas por toda a escala (as do arquivo concentram-se entre
+        # 3 e 5), com uma casa decimal como no arquivo, e algumas sem nota.
+        rng = np.random.default_rng(0)
+        notas = rng.integers(0, 51, len(df)) / 10
+        notas[rng.choice(len(df), 50, replace=False)] = np.nan
+        df = df.assign(aggregate_rating=notas)
+    return df
+
+@pytest.fixture(scope='module')
+def histograma(df):
+    return construir_histograma_notas(df)
+
+def contar_por_varredura(df, selecionadas):
+    contagens = df[selecionadas].groupby(['city', 'country'], observed=True).size()
+    return contagens[contagens > 0]
+
+@pytest.mark.parametrize('nota', LIMIARES)
+def test_nota_acima_igual_a_varredura(df, histograma, nota):
+    esperado = contar_por_varredura(df, df['aggregate_rating'] > nota)
+    pd.testing.assert_series_equal(restaurantes_nota_acima(histograma, nota), esperado, check_names=False)
+
+@pytest.mark.parametrize('nota', LIMIARES)
+def test_nota_abaixo_igual_a_varredura(df, histograma, nota):
+    esperado = contar_por_varredura(df, df['aggregate_rating'] < nota)
+    pd.testing.assert_series_equal(restaurantes_nota_abaixo(histograma, nota), esperado, check_names=False)
+
+# =========================
+# Módulo: Custo Médio
+# =========================
+
+@pytest.fixture(scope='module')
+def painel():
+    return pipeline_dados(CAMINHO_PADRAO, colunas=COLUNAS_PAINEL)
+
+def test_custo_por_cidade_igual_a_groupby(painel):
+    obtido = media_custo_por_cidade(construir_cubo(painel))
+    esperado = painel.dropna(subset=['cost_for_two_usd']).groupby(['city', 'country'], observed=True)['cost_for_two_usd'].mean()
+    pd.testing.assert_series_equal(obtido.sort_index(), esperado.sort_index(), check_names=False)
+
+def test_custo_por_culinaria_igual_a_explode(painel):
+    obtido = media_custo_por_culinaria(construir_cubo_culinarias(painel))
+    pares = painel.assign(cuisine=painel['all_cuisines'].astype(str).str.split(',')).explode('cuisine')
+    pares['cuisine'] = pares['cuisine'].str.strip()
+    pares = pares[pares['cuisine'] != ''].drop_duplicates(['restaurant_id', 'cuisine'])
+    esperado = pares.dropna(subset=['cost_for_two_usd']).groupby('cuisine')['cost_for_two_usd'].mean()
+    obtido.index = obtido.index.astype(str)
+    pd.testing.assert_series_equal(obtido.sort_index(), esperado.sort_index(), check_names=False)
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fome_zero.agregados import construir_cubo_culinarias, culinarias_por_cidade
+from fome_zero.culinarias import construir_indice_culinarias, contar_culinarias, posicoes_culinaria
+from fome_zero.dados import CAMINHO_PADRAO, COLUNAS_PAINEL, pipeline_dados
+
+@pytest.fixture(scope='module')
+def painel():
+    return pipeline_dados(CAMINHO_PADRAO, colunas=COLUNAS_PAINEL)
+
+@pytest.fixture(scope='module')
+def sintetico():
+    # Listas com espaços, itens vazios e culinárias repetidas no mesmo restaurante.
+    combinacoes = ['Italian, Pizza', 'Pizza,Italian', ' Thai ,, Thai', 'Cafe', 'Italian, Pizza, Italian', 'Bar Food, Cafe']
+    rng = np.random.default_rng(0)
+    quantidade = 3000
+    return pd.DataFrame({
+        'restaurant_id': np.arange(quantidade),
+        'country': pd.Categorical(rng.choice(['Brazil', 'India'], quantidade)),
+        'city': pd.Categorical(rng.choice(['Rio', 'Goa', 'Delhi'], quantidade)),
+        'all_cuisines': pd.Categorical(rng.choice(combinacoes, quantidade)),
+        'votes': rng.integers(0, 100, quantidade),
+        'aggregate_rating': rng.integers(0, 10, quantidade) / 2,
+        'cost_for_two_usd': rng.uniform(5, 50, quantidade),
+    })
+
+@pytest.fixture(scope='module', params=['painel', 'sintetico'])
+def df(request):
+    return request.getfixturevalue(request.param)
+
+def explodir(df):
+    # Uma linha por restaurante e culinária, sem repetir a culinária no mesmo restaurante.
+    pares = df[['city', 'country']].assign(
+        linha=np.arange(len(df)), cuisine=df['all_cuisines'].astype(str).str.split(',')
+    ).explode('cuisine')
+    pares['cuisine'] = pares['cuisine'].str.strip()
+    return pares[pares['cuisine'] != ''].drop_duplicates(['linha', 'cuisine'])
+
+def test_indice_igual_a_explode(df):
+    indice = construir_indice_culinarias(df)
+    pares = explodir(df)
+    np.testing.assert_array_equal(indice['linhas'], pares['linha'].to_numpy())
+    np.testing.assert_array_equal(indice['nomes'][indice['culinarias']], pares['cuisine'].to_numpy())
+    esperado = pares.groupby('cuisine')['linha'].apply(np.sort)
+    assert sorted(indice['por_culinaria']) == sorted(esperado.index)
+    for nome, posicoes in esperado.items():
+        np.testing.assert_array_equal(indice['por_culinaria'][nome], posicoes, err_msg=nome)
+        np.testing.assert_array_equal(posicoes_culinaria(indice, f' {nome.upper()} '), posicoes)
+
+def test_culinarias_por_cidade_igual_a_explode(df):
+    obtido = culinarias_por_cidade(construir_cubo_culinarias(df))
+    esperado = explodir(df).groupby(['city', 'country'], observed=True)['cuisine'].nunique()
+    pd.testing.assert_series_equal(
+        obtido.sort_index(), esperado.sort_index(), check_names=False, check_index_type=False, check_dtype=False
+    )
+
+def test_contar_culinarias_igual_a_explode(df):
+    pares = explodir(df)
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        linhas = np.sort(rng.choice(len(df), rng.integers(0, 200), replace=False))
+        esperado = pares.loc[pares['linha'].isin(linhas), 'cuisine'].nunique()
+        assert contar_culinarias(df['all_cuisines'].take(linhas)) == esperado
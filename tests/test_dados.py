@@ -0,0 +1,90 @@
+import logging
+
+import pandas as pd
+import pytest
+
+from fome_zero import snapshot
+from fome_zero.dados import (
+    CAMINHO_PADRAO, COLUNAS_PAINEL, ORIGEM_COLUNAS_DERIVADAS, TIPOS_COLUNAS_CSV, VARIAVEL_POLITICA_DUPLICADOS,
+    carregar_dataset, limpar_cache_dataset, pipeline_dados
+)
+
+@pytest.fixture(scope='module')
+def completo():
+    return pipeline_dados(CAMINHO_PADRAO)
+
+@pytest.mark.parametrize('coluna', ['currency', 'country_code', *ORIGEM_COLUNAS_DERIVADAS])
+def test_coluna_projetada_igual_a_do_pipeline_completo(completo, coluna):
+    # Ler só as colunas pedidas não pode mudar o valor de nenhuma delas.
+    projetado = pipeline_dados(CAMINHO_PADRAO, colunas=[coluna])
+    assert list(projetado.columns) == [coluna]
+    pd.testing.assert_series_equal(projetado[coluna], completo[coluna])
+
+def test_moeda_original_e_codigo_iso(completo):
+    filipinas = completo[completo['country'] == 'Philippines']
+    assert set(filipinas['currency']) == {'Botswana Pula(P)'}
+    assert set(filipinas['currency_code']) == {'PHP'}
+
+# =========================
+# Módulo: Política de Duplicados
+# =========================
+
+@pytest.fixture
+def csv_duplicados(tmp_path):
+    # Três restaurantes, cada um com uma segunda linha no fim do arquivo:
+    # o primeiro com outros votos, o segundo idêntico e o terceiro com outro
+    # endereço (coluna que o painel não lê).
+    bruto = pd.read_csv(CAMINHO_PADRAO, dtype=TIPOS_COLUNAS_CSV).drop_duplicates('Restaurant ID').head(10)
+    copias = bruto.head(3).copy()
+    copias.loc[copias.index[0], 'Votes'] += 1000
+    copias.loc[copias.index[2], 'Address'] = 'Outro endereço'
+    caminho = str(tmp_path / 'zomato.csv')
+    pd.concat([bruto, copias]).to_csv(caminho, index=False)
+    limpar_cache_dataset()
+    yield caminho, bruto
+    limpar_cache_dataset()
+
+def votos(df, restaurant_id):
+    return int(df.loc[df['restaurant_id'] == restaurant_id, 'votes'].iloc[0])
+
+def test_politica_primeiro_mantem_a_primeira_linha(csv_duplicados, caplog):
+    caminho, bruto = csv_duplicados
+    with caplog.at_level(logging.WARNING, logger='fome_zero.dados'):
+        df = pipeline_dados(caminho, 'primeiro', colunas=['restaurant_id', 'votes'])
+    assert len(df) == len(bruto)
+    assert votos(df, bruto['Restaurant ID'].iloc[0]) == bruto['Votes'].iloc[0]
+    assert "3 linhas duplicadas removidas (política 'primeiro')" in caplog.text
+
+def test_politica_ultimo_mantem_a_ultima_linha(csv_duplicados):
+    caminho, bruto = csv_duplicados
+    df = pipeline_dados(caminho, 'ultimo', colunas=['restaurant_id', 'votes'])
+    assert len(df) == len(bruto)
+    assert votos(df, bruto['Restaurant ID'].iloc[0]) == bruto['Votes'].iloc[0] + 1000
+
+def test_politica_falhar_compara_todas_as_colunas(csv_duplicados):
+    caminho, bruto = csv_duplicados
+    with pytest.raises(ValueError, match='2 restaurantes'):
+        # Address não foi pedida e mesmo assim entra na comparação.
+        pipeline_dados(caminho, 'falhar', colunas=['restaurant_id', 'votes'])
+    identicos = pd.concat([bruto, bruto.iloc[[1]]])
+    identicos.to_csv(caminho, index=False)
+    df = pipeline_dados(caminho, 'falhar', colunas=['restaurant_id', 'votes'])
+    assert list(df.columns) == ['restaurant_id', 'votes']
+    assert len(df) == len(bruto)
+
+def test_politica_configurada_vale_para_o_dataset_e_o_snapshot(csv_duplicados, monkeypatch):
+    caminho, bruto = csv_duplicados
+    restaurant_id = bruto['Restaurant ID'].iloc[0]
+    assert votos(carregar_dataset(caminho), restaurant_id) == bruto['Votes'].iloc[0]
+
+    # O snapshot gravado com 'primeiro' não serve para outra política.
+    monkeypatch.setenv(VARIAVEL_POLITICA_DUPLICADOS, 'ultimo')
+    parquet = snapshot.caminho_snapshot(caminho)
+    assert snapshot.ler_snapshot(parquet, caminho, 'primeiro', COLUNAS_PAINEL) is not None
+    assert snapshot.ler_snapshot(parquet, caminho, 'ultimo', COLUNAS_PAINEL) is None
+    assert votos(carregar_dataset(caminho), restaurant_id) == bruto['Votes'].iloc[0] + 1000
+    assert snapshot.ler_metadados(parquet)['politica_duplicados'] == 'ultimo'
+
+    monkeypatch.setenv(VARIAVEL_POLITICA_DUPLICADOS, 'nenhuma')
+    with pytest.raises(ValueError, match='nenhuma'):
+        carregar_dataset(caminho)
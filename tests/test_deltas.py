@@ -0,0 +1,284 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import fome_zero.dados as dados
+from fome_zero import snapshot
+from fome_zero.agregados import construir_cubo, construir_cubo_culinarias, construir_histograma_notas
+from fome_zero.dados import (
+    CAMINHO_PADRAO, COLUNAS_PAINEL, TIPOS_COLUNAS_CSV, VARIAVEL_DATASET_COMPARTILHADO, carregar_dataset,
+    dataset_fixo, fixar_dataset, limpar_cache_dataset, obter_estrutura, pasta_deltas, preparar_estruturas,
+    projetar_colunas, tratar_dados, versao_dataset
+)
+from fome_zero.espacial import construir_indice_espacial
+from fome_zero.filtros import construir_indice_filtros, filtrar
+
+CODIGO_FILIPINAS = 162
+
+@pytest.fixture
+def csv(tmp_path, monkeypatch):
+    # Cópia do dataset numa pasta temporária, com a pasta de deltas verificada
+    # a cada consulta e arquivos aceitos logo depois de escritos.
+    monkeypatch.setattr(dados, 'INTERVALO_VERIFICACAO_DELTAS', 0)
+    monkeypatch.setattr(dados, 'ESPERA_DELTA_ESTAVEL', 0)
+    caminho = str(tmp_path / 'zomato.csv')
+    shutil.copy(CAMINHO_PADRAO, caminho)
+    os.makedirs(pasta_deltas(caminho))
+    limpar_cache_dataset()
+    yield caminho
+    limpar_cache_dataset()
+
+@pytest.fixture(scope='module')
+def bruto():
+    return pd.read_csv(CAMINHO_PADRAO, dtype=TIPOS_COLUNAS_CSV)
+
+def escrever_delta(csv, nome, linhas):
+    linhas.to_csv(os.path.join(pasta_deltas(csv), nome), index=False)
+
+def novas_filipinas(bruto, quantidade):
+    # Restaurantes novos nas Filipinas: aumentam o DataFrame e mudam as
+    # posições do país no índice de filtros.
+    novas = bruto[bruto['Country Code'] == CODIGO_FILIPINAS].head(quantidade).copy()
+    novas['Restaurant ID'] = 10**9 + np.arange(quantidade)
+    return novas
+
+def delta_misto(bruto, semente, num_substituidas, num_novas):
+    # Restaurantes existentes com nota, votos, cidade, culinária, preço e
+    # coordenadas alterados; restaurantes novos com culinária e cidade novas;
+    # e IDs repetidos no mesmo arquivo (vale a última linha).
+    rng = np.random.default_rng(semente)
+    substituidas = bruto.drop_duplicates('Restaurant ID').sample(num_substituidas, random_state=semente).copy()
+    substituidas['Aggregate rating'] = rng.uniform(0, 5, num_substituidas).round(1)
+    substituidas['Votes'] = rng.integers(0, 9999, num_substituidas)
+    substituidas['Latitude'] = substituidas['Latitude'] + rng.normal(0, 1, num_substituidas)
+    substituidas.loc[substituidas.index[:3], 'City'] = 'Cidade Nova'
+    substituidas.loc[substituidas.index[3:6], 'Cuisines'] = 'Zzz Food, Italian'
+    substituidas.loc[substituidas.index[6:8], 'Price range'] = 4
+    novas = bruto.sample(num_novas, random_state=semente + 1).copy()
+    novas['Restaurant ID'] = 10**9 + 1000 * semente + np.arange(num_novas)
+    novas.loc[novas.index[:2], 'Cuisines'] = 'Aaa Novel'
+    novas.loc[novas.index[2:4], 'Country Code'] = 1
+    novas.loc[novas.index[2:4], 'City'] = 'AAA Town'
+    return pd.concat([substituidas, novas, substituidas.head(2).assign(Votes=1)])
+
+def filtrar_por_varredura(df, pais):
+    return df[df['country'] == pais].reset_index(drop=True)
+
+# =========================
+# Módulo: Estado Fixado
+# =========================
+
+def test_estado_fixado_sobrevive_a_um_delta(csv, bruto):
+    fixar_dataset(csv)
+    df = carregar_dataset(csv)
+    versao = versao_dataset(csv)
+    escrever_delta(csv, '001.csv', novas_filipinas(bruto, 5))
+
+    # Mesma sequência de uma página: DataFrame lido antes, índice depois.
+    indice = obter_estrutura('indice_filtros', construir_indice_filtros, csv)
+    obtido = filtrar(df, indice, {'country': ['Philippines']}).materializar().reset_index(drop=True)
+    pd.testing.assert_frame_equal(obtido, filtrar_por_varredura(df, 'Philippines'))
+    assert carregar_dataset(csv) is df
+    assert versao_dataset(csv) == versao
+
+def test_proxima_execucao_ve_o_delta(csv, bruto):
+    fixar_dataset(csv)
+    df = carregar_dataset(csv)
+    versao = versao_dataset(csv)
+    escrever_delta(csv, '001.csv', novas_filipinas(bruto, 5))
+
+    fixar_dataset(csv)
+    df_novo = carregar_dataset(csv)
+    indice = obter_estrutura('indice_filtros', construir_indice_filtros, csv)
+    assert len(df_novo) == len(df) + 5
+    assert versao_dataset(csv) != versao
+    obtido = filtrar(df_novo, indice, {'country': ['Philippines']}).materializar().reset_index(drop=True)
+    pd.testing.assert_frame_equal(obtido, filtrar_por_varredura(df_novo, 'Philippines'))
+
+def test_dataset_fixo_restaura_o_estado_anterior(csv, bruto):
+    fixar_dataset(csv)
+    df = carregar_dataset(csv)
+    escrever_delta(csv, '001.csv', novas_filipinas(bruto, 5))
+
+    with dataset_fixo(csv):
+        assert len(carregar_dataset(csv)) == len(df) + 5
+    assert carregar_dataset(csv) is df
+
+def test_estruturas_do_estado_antigo_nao_mudam(csv, bruto):
+    fixar_dataset(csv)
+    df = carregar_dataset(csv)
+    indice = obter_estrutura('indice_filtros', construir_indice_filtros, csv)
+    filipinas = indice['country']['Philippines'].copy()
+    escrever_delta(csv, '001.csv', novas_filipinas(bruto, 5))
+
+    fixar_dataset(csv)
+    obter_estrutura('indice_filtros', construir_indice_filtros, csv)
+    np.testing.assert_array_equal(indice['country']['Philippines'], filipinas)
+    assert filipinas.max() < len(df)
+
+def test_estruturas_em_paralelo_usam_o_estado_fixado(csv, bruto, monkeypatch):
+    monkeypatch.setattr(dados, 'TRABALHADORES_ESTRUTURAS', 4)
+    fixar_dataset(csv)
+    df = carregar_dataset(csv)
+    escrever_delta(csv, '001.csv', novas_filipinas(bruto, 5))
+
+    lido, cubo, indice = preparar_estruturas(
+        lambda: carregar_dataset(csv),
+        lambda: obter_estrutura('cubo', construir_cubo, csv),
+        lambda: obter_estrutura('indice_filtros', construir_indice_filtros, csv),
+    )
+    assert lido is df
+    pd.testing.assert_frame_equal(cubo, construir_cubo(df))
+    comparar_indices(indice, construir_indice_filtros(df))
+    # Construídas no pool, mas guardadas no estado fixado desta thread.
+    assert obter_estrutura('cubo', construir_cubo, csv) is cubo
+
+# =========================
+# Módulo: Arquivos de Delta
+# =========================
+
+def test_delta_invalido_e_rejeitado(csv, bruto, caplog):
+    df = carregar_dataset(csv)
+    invalido = novas_filipinas(bruto, 3).astype({'Votes': object})
+    invalido['Votes'] = 'n/a'
+    escrever_delta(csv, '001.csv', invalido)
+
+    assert carregar_dataset(csv) is df
+    assert carregar_dataset(csv) is df
+    assert not os.path.exists(os.path.join(pasta_deltas(csv), '001.csv'))
+    assert os.path.exists(os.path.join(pasta_deltas(csv), 'rejeitados', '001.csv'))
+    assert '001.csv' in caplog.text
+
+    # Os deltas seguintes continuam sendo aplicados.
+    escrever_delta(csv, '002.csv', novas_filipinas(bruto, 4))
+    assert len(carregar_dataset(csv)) == len(df) + 4
+
+def test_delta_sem_coluna_e_rejeitado(csv, bruto):
+    df = carregar_dataset(csv)
+    escrever_delta(csv, '001.csv', novas_filipinas(bruto, 3).drop(columns=['Aggregate rating']))
+    assert carregar_dataset(csv) is df
+    assert os.path.exists(os.path.join(pasta_deltas(csv), 'rejeitados', '001.csv'))
+
+def test_nomes_temporarios_sao_ignorados(csv, bruto):
+    df = carregar_dataset(csv)
+    escrever_delta(csv, '.001.csv', novas_filipinas(bruto, 3))
+    escrever_delta(csv, '001.csv.tmp', novas_filipinas(bruto, 3))
+    assert carregar_dataset(csv) is df
+
+    os.replace(os.path.join(pasta_deltas(csv), '001.csv.tmp'), os.path.join(pasta_deltas(csv), '001.csv'))
+    assert len(carregar_dataset(csv)) == len(df) + 3
+
+def test_delta_recente_espera_estabilizar(csv, bruto, monkeypatch):
+    df = carregar_dataset(csv)
+    monkeypatch.setattr(dados, 'ESPERA_DELTA_ESTAVEL', 60)
+    escrever_delta(csv, '001.csv', novas_filipinas(bruto, 3))
+    assert carregar_dataset(csv) is df
+
+    monkeypatch.setattr(dados, 'ESPERA_DELTA_ESTAVEL', 0)
+    assert len(carregar_dataset(csv)) == len(df) + 3
+
+def test_delta_alterado_depois_de_aplicado_e_reaplicado(csv, bruto):
+    df = carregar_dataset(csv)
+    linhas = novas_filipinas(bruto, 3)
+    escrever_delta(csv, '001.csv', linhas.head(1))
+    assert len(carregar_dataset(csv)) == len(df) + 1
+
+    escrever_delta(csv, '001.csv', linhas)
+    os.utime(os.path.join(pasta_deltas(csv), '001.csv'), ns=(0, 10**18))
+    assert len(carregar_dataset(csv)) == len(df) + 3
+
+# =========================
+# Módulo: Resultado dos Deltas
+# =========================
+
+ESTRUTURAS = {
+    'cubo': construir_cubo,
+    'cubo_culinarias': construir_cubo_culinarias,
+    'histograma_notas': construir_histograma_notas,
+    'indice_filtros': construir_indice_filtros,
+    'indice_espacial': construir_indice_espacial,
+}
+
+@pytest.fixture
+def aplicado(csv, bruto):
+    # Estruturas construídas antes dos deltas, para serem atualizadas por eles.
+    df = carregar_dataset(csv)
+    for nome, construir in ESTRUTURAS.items():
+        obter_estrutura(nome, construir, csv)
+    deltas = [delta_misto(bruto, 1, 50, 30), delta_misto(bruto, 2, 20, 10)]
+    for numero, delta in enumerate(deltas, start=1):
+        escrever_delta(csv, f'{numero:03d}.csv', delta)
+        carregar_dataset(csv)
+    return df, deltas
+
+def comparar_indices(obtido, esperado):
+    assert obtido.keys() == esperado.keys()
+    for chave in esperado:
+        if isinstance(esperado[chave], dict):
+            comparar_indices(obtido[chave], esperado[chave])
+        else:
+            np.testing.assert_array_equal(obtido[chave], esperado[chave])
+
+def test_delta_substitui_e_acrescenta(csv, bruto, aplicado):
+    df, deltas = aplicado
+    df_novo = carregar_dataset(csv)
+    todas = tratar_dados(pd.concat([bruto] + deltas, ignore_index=True))
+    ultimas = projetar_colunas(todas, COLUNAS_PAINEL).drop_duplicates('restaurant_id', keep='last')
+
+    assert df_novo['restaurant_id'].is_unique
+    # IDs existentes ficam na mesma posição; os novos entram no fim.
+    np.testing.assert_array_equal(df_novo['restaurant_id'].to_numpy()[:len(df)], df['restaurant_id'].to_numpy())
+    obtido = df_novo.set_index('restaurant_id').sort_index().astype(object)
+    esperado = ultimas.set_index('restaurant_id').sort_index()[obtido.columns].astype(object)
+    pd.testing.assert_frame_equal(obtido, esperado)
+    for coluna in df_novo.select_dtypes('category'):
+        assert df_novo[coluna].cat.categories.is_monotonic_increasing
+
+@pytest.mark.parametrize('nome', ['cubo', 'cubo_culinarias', 'histograma_notas'])
+def test_agregados_iguais_aos_reconstruidos(csv, aplicado, nome):
+    df_novo = carregar_dataset(csv)
+    obtido = obter_estrutura(nome, ESTRUTURAS[nome], csv)
+    pd.testing.assert_frame_equal(obtido, ESTRUTURAS[nome](df_novo), check_exact=False)
+
+@pytest.mark.parametrize('nome', ['indice_filtros', 'indice_espacial'])
+def test_indices_iguais_aos_reconstruidos(csv, aplicado, nome):
+    df_novo = carregar_dataset(csv)
+    comparar_indices(obter_estrutura(nome, ESTRUTURAS[nome], csv), ESTRUTURAS[nome](df_novo))
+
+def test_dataset_compartilhado_volta_a_ser_mapeado(csv, bruto, monkeypatch):
+    delta = delta_misto(bruto, 1, 50, 30)
+    escrever_delta(csv, '001.csv', delta)
+    privado = carregar_dataset(csv)
+    limpar_cache_dataset()
+    os.remove(os.path.join(pasta_deltas(csv), '001.csv'))
+
+    monkeypatch.setenv(VARIAVEL_DATASET_COMPARTILHADO, '1')
+    carregar_dataset(csv)
+    escrever_delta(csv, '001.csv', delta)
+    df = carregar_dataset(csv)
+    aberto = snapshot.abrir_compartilhado(snapshot.caminho_compartilhado(csv), csv, 'primeiro', COLUNAS_PAINEL)
+    assert snapshot.deltas_publicados(aberto[1]) == dados.listar_deltas(csv)
+    # Colunas apontando para o arquivo mapeado, não para uma cópia privada.
+    assert not df['aggregate_rating'].to_numpy().flags.writeable
+    for coluna in ['restaurant_id', 'aggregate_rating', 'votes', 'city', 'cuisines']:
+        np.testing.assert_array_equal(df[coluna].to_numpy(), privado[coluna].to_numpy())
+
+    # Um processo novo mapeia o arquivo já com o delta e não o aplica de novo.
+    versao = versao_dataset(csv)
+    limpar_cache_dataset()
+    assert len(carregar_dataset(csv)) == len(df)
+    assert versao_dataset(csv) == versao
+
+def test_colunas_completas_acompanham_o_painel(csv, bruto, monkeypatch):
+    carregar_dataset(csv)
+    carregar_dataset(csv, colunas=None)
+    monkeypatch.setattr(dados, 'INTERVALO_VERIFICACAO_DELTAS', 60)
+    escrever_delta(csv, '001.csv', novas_filipinas(bruto, 5))
+    dados.obter_entrada(csv)['verificado_em'] = None
+
+    painel = carregar_dataset(csv)
+    completo = carregar_dataset(csv, colunas=None)
+    assert set(painel['restaurant_id']) <= set(completo['restaurant_id'])
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fome_zero.espacial import (
+    construir_indice_espacial, distancia_km, mais_proximos, posicoes_no_raio, posicoes_no_retangulo
+)
+
+NUM_CONSULTAS = 150
+
+@pytest.fixture(scope='module')
+def pontos():
+    # Aglomerados (como cidades) mais pontos espalhados, com alguns perto do
+    # antimeridiano e dos polos, e linhas sem coordenadas.
+    rng = np.random.default_rng(0)
+    centros = rng.uniform([-60, -180], [70, 180], size=(40, 2))
+    perto = centros[rng.integers(0, len(centros), 3000)] + rng.normal(0, 0.05, (3000, 2))
+    espalhados = rng.uniform([-90, -180], [90, 180], size=(1000, 2))
+    antimeridiano = np.column_stack([rng.uniform(-30, 30, 200), rng.choice([-179.9, 179.9], 200) + rng.normal(0, 0.05, 200)])
+    coordenadas = np.vstack([perto, espalhados, antimeridiano])
+    coordenadas[:, 0] = np.clip(coordenadas[:, 0], -90, 90)
+    coordenadas[:, 1] = (coordenadas[:, 1] + 180) % 360 - 180
+    coordenadas[rng.choice(len(coordenadas), 20, replace=False)] = np.nan
+    return pd.DataFrame({'latitude': coordenadas[:, 0], 'longitude': coordenadas[:, 1]})
+
+@pytest.fixture(scope='module', params=[0.01, 1.0])
+def indice(request, pontos):
+    return construir_indice_espacial(pontos, request.param)
+
+def retangulo_bruto(pontos, sul, oeste, norte, leste):
+    latitudes, longitudes = pontos['latitude'].to_numpy(), pontos['longitude'].to_numpy()
+    if oeste > leste:
+        dentro_longitude = (longitudes >= oeste) | (longitudes <= leste)
+    else:
+        dentro_longitude = (longitudes >= oeste) & (longitudes <= leste)
+    return np.flatnonzero((latitudes >= sul) & (latitudes <= norte) & dentro_longitude)
+
+def test_retangulo_igual_a_varredura(pontos, indice):
+    rng = np.random.default_rng(1)
+    for _ in range(NUM_CONSULTAS):
+        sul, norte = np.sort(rng.uniform(-90, 90, 2))
+        oeste, leste = np.sort(rng.uniform(-180, 180, 2))
+        obtido = posicoes_no_retangulo(indice, sul, oeste, norte, leste)
+        np.testing.assert_array_equal(obtido, retangulo_bruto(pontos, sul, oeste, norte, leste))
+
+def test_retangulo_cruzando_antimeridiano(pontos, indice):
+    rng = np.random.default_rng(2)
+    for _ in range(NUM_CONSULTAS):
+        sul, norte = np.sort(rng.uniform(-60, 60, 2))
+        oeste, leste = rng.uniform(100, 180), rng.uniform(-180, -100)
+        obtido = posicoes_no_retangulo(indice, sul, oeste, norte, leste)
+        np.testing.assert_array_equal(obtido, retangulo_bruto(pontos, sul, oeste, norte, leste))
+
+def test_retangulo_com_longitudes_do_leaflet(pontos, indice):
+    # O Leaflet devolve longitudes fora de [-180, 180) depois de arrastar o mapa.
+    obtido = posicoes_no_retangulo(indice, -20, 170, 20, 190)
+    np.testing.assert_array_equal(obtido, retangulo_bruto(pontos, -20, 170, 20, -170))
+    tudo = posicoes_no_retangulo(indice, -90, -400, 90, 400)
+    np.testing.assert_array_equal(tudo, retangulo_bruto(pontos, -90, -180, 90, 180))
+
+def test_raio_igual_a_varredura(pontos, indice):
+    rng = np.random.default_rng(3)
+    latitudes, longitudes = pontos['latitude'].to_numpy(), pontos['longitude'].to_numpy()
+    for _ in range(NUM_CONSULTAS):
+        latitude, longitude = rng.uniform(-89, 89), rng.uniform(-180, 180)
+        raio_km = 10 ** rng.uniform(0, 4)
+        posicoes, distancias = posicoes_no_raio(indice, latitude, longitude, raio_km)
+        todas = distancia_km(latitude, longitude, latitudes, longitudes)
+        esperadas = np.flatnonzero(todas <= raio_km)
+        np.testing.assert_array_equal(np.sort(posicoes), esperadas)
+        assert np.all(np.diff(distancias) >= 0)
+        np.testing.assert_allclose(distancias, todas[posicoes])
+
+def test_mais_proximos_igual_a_varredura(pontos, indice):
+    rng = np.random.default_rng(4)
+    latitudes, longitudes = pontos['latitude'].to_numpy(), pontos['longitude'].to_numpy()
+    for _ in range(NUM_CONSULTAS):
+        latitude, longitude = rng.uniform(-89, 89), rng.uniform(-180, 180)
+        k = int(rng.integers(1, 20))
+        _, distancias = mais_proximos(indice, latitude, longitude, k)
+        todas = distancia_km(latitude, longitude, latitudes, longitudes)
+        esperadas = np.sort(todas[~np.isnan(todas)])[:k]
+        np.testing.assert_allclose(distancias, esperadas)
@@ -0,0 +1,88 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import fome_zero.dados as dados
+from fome_zero import snapshot
+from fome_zero.dados import (
+    CAMINHO_PADRAO, COLUNAS_PAINEL, TIPOS_COLUNAS_CSV, VARIAVEL_DATASET_COMPARTILHADO, carregar_dataset,
+    carregar_restaurantes, fixar_dataset, limpar_cache_dataset, pasta_deltas, pipeline_dados
+)
+from fome_zero.exportacao import COLUNAS_INTERNAS
+
+@pytest.fixture
+def csv(tmp_path, monkeypatch):
+    monkeypatch.setattr(dados, 'INTERVALO_VERIFICACAO_DELTAS', 0)
+    monkeypatch.setattr(dados, 'ESPERA_DELTA_ESTAVEL', 0)
+    caminho = str(tmp_path / 'zomato.csv')
+    shutil.copy(CAMINHO_PADRAO, caminho)
+    os.makedirs(pasta_deltas(caminho))
+    limpar_cache_dataset()
+    yield caminho
+    limpar_cache_dataset()
+
+@pytest.fixture(scope='module')
+def completo():
+    return pipeline_dados(CAMINHO_PADRAO)
+
+def selecao(df, semente, quantidade=300):
+    # Restaurantes do painel em ordem aleatória, como sai de uma ordenação da página.
+    return df.sample(quantidade, random_state=semente).reset_index(drop=True)
+
+def esperado(completo, ids):
+    linhas = completo.set_index('restaurant_id', drop=False).loc[ids].reset_index(drop=True)
+    return linhas.drop(columns=COLUNAS_INTERNAS)
+
+def comparar(obtido, referencia):
+    # Mesmos valores; o tipo das categorias pode mudar quando um delta entra.
+    pd.testing.assert_frame_equal(obtido.astype(object), referencia.astype(object))
+
+def test_exportacao_le_so_os_restaurantes_filtrados(csv, completo):
+    filtrado = selecao(carregar_dataset(csv), 1)
+    exportado = carregar_restaurantes(filtrado['restaurant_id'].to_numpy(), csv).drop(columns=COLUNAS_INTERNAS)
+    comparar(exportado, esperado(completo, filtrado['restaurant_id']))
+    # Nenhum DataFrame completo fica em cache.
+    assert all(chave[1] is not None for chave in dados._cache_datasets)
+    # O snapshot completo gravado na primeira exportação serve à seguinte e ao painel.
+    assert snapshot.ler_metadados(snapshot.caminho_snapshot(csv))['completo']
+    exportado = carregar_restaurantes(filtrado['restaurant_id'].to_numpy(), csv).drop(columns=COLUNAS_INTERNAS)
+    comparar(exportado, esperado(completo, filtrado['restaurant_id']))
+    limpar_cache_dataset()
+    assert set(carregar_dataset(csv).columns) == set(COLUNAS_PAINEL)
+
+def test_exportacao_segue_a_versao_fixada(csv, completo):
+    bruto = pd.read_csv(CAMINHO_PADRAO, dtype=TIPOS_COLUNAS_CSV).drop_duplicates('Restaurant ID')
+    alterados = bruto.head(20).copy()
+    alterados['Votes'] = 10**6 + np.arange(20)
+    novos = bruto.tail(5).copy()
+    novos['Restaurant ID'] = 10**9 + np.arange(5)
+    antes = fixar_dataset(csv)
+
+    pd.concat([alterados, novos]).to_csv(os.path.join(pasta_deltas(csv), '001.csv'), index=False)
+    depois = fixar_dataset(csv)
+    assert depois is not antes
+    ids = np.concatenate([novos['Restaurant ID'], alterados['Restaurant ID'], completo['restaurant_id'][100:120]])
+    exportado = carregar_restaurantes(ids, csv)
+    assert exportado['restaurant_id'].tolist() == ids.tolist()
+    votos = dict(zip(exportado['restaurant_id'], exportado['votes']))
+    assert [votos[i] for i in alterados['Restaurant ID']] == alterados['Votes'].tolist()
+    assert [votos[i] for i in novos['Restaurant ID']] == novos['Votes'].tolist()
+
+    # Uma execução que começou antes do delta exporta a versão que viu.
+    with dados.estado_fixado(antes, csv):
+        exportado = carregar_restaurantes(ids, csv)
+    comparar(exportado, completo.set_index('restaurant_id', drop=False).loc[ids[ids < 10**9]].reset_index(drop=True))
+
+def test_exportacao_nao_regrava_o_dataset_compartilhado(csv, completo, monkeypatch):
+    monkeypatch.setenv(VARIAVEL_DATASET_COMPARTILHADO, '1')
+    filtrado = selecao(carregar_dataset(csv), 2)
+    caminho_arrow = snapshot.caminho_compartilhado(csv)
+    antes = os.stat(caminho_arrow).st_mtime_ns
+    exportado = carregar_restaurantes(filtrado['restaurant_id'].to_numpy(), csv)
+    comparar(exportado.drop(columns=COLUNAS_INTERNAS), esperado(completo, filtrado['restaurant_id']))
+    assert os.stat(caminho_arrow).st_mtime_ns == antes
+    aberto = snapshot.abrir_compartilhado(caminho_arrow, csv, 'primeiro', COLUNAS_PAINEL)
+    assert set(aberto[0].columns) == set(COLUNAS_PAINEL)
@@ -0,0 +1,74 @@
+import copy
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fome_zero.dados import CAMINHO_PADRAO, COLUNAS_PAINEL, pipeline_dados
+from fome_zero.filtros import COLUNAS_INDEXADAS, VisaoFiltrada, construir_indice_filtros, filtrar
+
+NUM_CONSULTAS = 150
+
+@pytest.fixture(scope='module')
+def df():
+    return pipeline_dados(CAMINHO_PADRAO, colunas=COLUNAS_PAINEL)
+
+@pytest.fixture(scope='module')
+def indice(df):
+    return construir_indice_filtros(df)
+
+def filtrar_bruto(df, selecoes):
+    mascara = np.ones(len(df), dtype=bool)
+    for coluna, valores in selecoes.items():
+        mascara &= df[coluna].isin(valores).to_numpy()
+    return np.flatnonzero(mascara)
+
+def selecao_aleatoria(df, rng):
+    # Algumas colunas indexadas, cada uma com alguns dos seus valores (às vezes nenhum).
+    selecoes = {}
+    for coluna in rng.permutation(COLUNAS_INDEXADAS)[:rng.integers(1, len(COLUNAS_INDEXADAS) + 1)]:
+        valores = df[coluna].dropna().unique()
+        selecoes[coluna] = list(rng.choice(valores, rng.integers(0, min(len(valores), 6) + 1), replace=False))
+    return selecoes
+
+def test_filtrar_igual_a_isin(df, indice):
+    rng = np.random.default_rng(0)
+    for _ in range(NUM_CONSULTAS):
+        selecoes = selecao_aleatoria(df, rng)
+        visao = filtrar(df, indice, selecoes)
+        np.testing.assert_array_equal(visao.posicoes, filtrar_bruto(df, selecoes), err_msg=str(selecoes))
+
+def test_filtrar_preco_e_pais(df, indice):
+    selecoes = {'country': ['India', 'Brazil', 'United States'], 'price_category': ['expensive', 'gourmet']}
+    visao = filtrar(df, indice, selecoes)
+    esperado = df.iloc[filtrar_bruto(df, selecoes)]
+    assert len(visao) == len(esperado) > 0
+    pd.testing.assert_series_equal(visao['restaurant_id'], esperado['restaurant_id'])
+    pd.testing.assert_frame_equal(visao.materializar(), esperado)
+
+def test_filtrar_selecao_vazia(df, indice):
+    # Nenhum valor marcado em uma coluna: nenhuma linha, com as colunas do DataFrame.
+    visao = filtrar(df, indice, {'country': ['India'], 'price_category': []})
+    assert visao.empty and len(visao) == 0 and visao.shape == (0, df.shape[1])
+    assert visao['city'].empty
+    # Valor inexistente e nenhuma seleção.
+    assert filtrar(df, indice, {'country': ['Atlântida']}).empty
+    np.testing.assert_array_equal(filtrar(df, indice, {}).posicoes, np.arange(len(df)))
+
+def test_visao_filtrada_atributos_do_dataframe(df, indice):
+    selecoes = {'country_code': [1, 216]}
+    visao = filtrar(df, indice, selecoes)
+    esperado = df.iloc[filtrar_bruto(df, selecoes)]
+    assert visao.columns.equals(df.columns)
+    assert visao['votes'].sum() == esperado['votes'].sum()
+    pd.testing.assert_frame_equal(visao.sort_values('votes'), esperado.sort_values('votes'))
+
+def test_visao_filtrada_copia_e_pickle(df, indice):
+    visao = filtrar(df, indice, {'country': ['Brazil']})
+    for outra in (copy.copy(visao), copy.deepcopy(visao), pickle.loads(pickle.dumps(visao))):
+        assert isinstance(outra, VisaoFiltrada)
+        np.testing.assert_array_equal(outra.posicoes, visao.posicoes)
+        pd.testing.assert_frame_equal(outra.materializar(), visao.materializar())
+    with pytest.raises(AttributeError):
+        visao._inexistente
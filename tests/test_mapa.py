@@ -0,0 +1,17 @@
+import pytest
+
+from fome_zero.mapa import CELULAS_POR_LADO_VIEWPORT, tamanho_celula_viewport
+
+@pytest.mark.parametrize('limites, largura', [
+    ((-10, -30, 10, 30), 60),
+    # Longitudes do Leaflet depois de arrastar o mapa sobre o antimeridiano.
+    ((-5, 170, 5, 190), 20),
+    # Mapa afastado mostrando mais de uma volta: a largura não dá a volta em 360.
+    ((-5, -200, 5, 200), 360),
+    ((-5, -300, 5, 420), 360),
+])
+def test_tamanho_celula_viewport(limites, largura):
+    assert tamanho_celula_viewport(limites) == pytest.approx(largura / CELULAS_POR_LADO_VIEWPORT)
+
+def test_tamanho_celula_usa_o_maior_lado():
+    assert tamanho_celula_viewport((-60, 0, 60, 10)) == pytest.approx(120 / CELULAS_POR_LADO_VIEWPORT)
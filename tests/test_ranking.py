@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fome_zero.culinarias import construir_indice_culinarias, mascara_culinaria
+from fome_zero.dados import CAMINHO_PADRAO, COLUNAS_PAINEL, pipeline_dados
+from fome_zero.ranking import construir_ranking, filtrar_ranking, top_k
+
+ORDEM = ['aggregate_rating', 'votes', 'restaurant_id']
+
+@pytest.fixture(scope='module')
+def painel():
+    return pipeline_dados(CAMINHO_PADRAO, colunas=COLUNAS_PAINEL)
+
+@pytest.fixture(scope='module')
+def empates():
+    # Poucas notas e votos distintos: quase toda posição depende do desempate.
+    rng = np.random.default_rng(0)
+    quantidade = 5000
+    return pd.DataFrame({
+        'restaurant_id': rng.permutation(10**6)[:quantidade],
+        'country': pd.Categorical(rng.choice(['Brazil', 'India', 'Qatar', 'UAE'], quantidade)),
+        'aggregate_rating': rng.integers(0, 4, quantidade) / 2,
+        'votes': rng.integers(0, 5, quantidade),
+    })
+
+@pytest.fixture(scope='module', params=['painel', 'empates'])
+def df(request):
+    return request.getfixturevalue(request.param)
+
+def top_k_bruto(df, k):
+    return df.sort_values(ORDEM, ascending=[False, False, True], kind='stable').head(k)
+
+@pytest.mark.parametrize('k', [1, 5, 10, 100, 10**6])
+def test_top_k_igual_a_ordenacao(df, k):
+    pd.testing.assert_frame_equal(top_k(construir_ranking(df), k), top_k_bruto(df, k))
+
+def test_top_k_por_paises_igual_a_ordenacao(df):
+    ranking = construir_ranking(df)
+    paises = df['country'].unique().tolist()
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        selecionados = list(rng.choice(paises, rng.integers(0, len(paises) + 1), replace=False))
+        k = int(rng.integers(1, 60))
+        esperado = top_k_bruto(df[df['country'].isin(selecionados)], k)
+        pd.testing.assert_frame_equal(top_k(filtrar_ranking(ranking, selecionados), k), esperado)
+
+def test_top_k_sem_paises_devolve_vazio(df):
+    resultado = top_k(filtrar_ranking(construir_ranking(df), []), 10)
+    assert resultado.empty and list(resultado.columns) == list(df.columns)
+
+@pytest.mark.parametrize('culinaria', ['Italian', 'japanese', 'Street Food', 'Nenhuma'])
+def test_top_k_de_culinaria_igual_a_ordenacao(painel, culinaria):
+    indice = construir_indice_culinarias(painel)
+    ranking = construir_ranking(painel, mascara_culinaria(indice, culinaria, len(painel)))
+    serve = painel['all_cuisines'].astype(str).str.split(',').apply(
+        lambda nomes: culinaria.lower() in {nome.strip().lower() for nome in nomes}
+    )
+    pd.testing.assert_frame_equal(top_k(ranking, 20), top_k_bruto(painel[serve.to_numpy()], 20))
@@ -0,0 +1,58 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+import fome_zero.servidor as servidor
+
+@pytest.fixture
+def endereco():
+    # Servidor numa porta livre, atendendo em segundo plano durante o teste.
+    http_servidor = servidor.criar_servidor('127.0.0.1', 0)
+    thread = threading.Thread(target=http_servidor.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield http_servidor.server_address
+    http_servidor.shutdown()
+    http_servidor.server_close()
+
+def enviar_post(endereco, corpo, content_length):
+    conexao = http.client.HTTPConnection(*endereco, timeout=10)
+    conexao.putrequest('POST', '/consultas')
+    conexao.putheader('Content-Type', 'application/json')
+    conexao.putheader('Content-Length', content_length)
+    conexao.endheaders(corpo)
+    resposta = conexao.getresponse()
+    resultado = resposta.status, json.loads(resposta.read())
+    conexao.close()
+    return resultado
+
+@pytest.mark.parametrize('content_length', ['abc', '-1', '+5', '1.5', '²'])
+def test_post_com_content_length_invalido(endereco, content_length):
+    status, corpo = enviar_post(endereco, b'{}', content_length)
+    assert status == 400
+    assert 'Content-Length' in corpo['erro']
+
+def test_post_grande_demais(endereco):
+    status, _ = enviar_post(endereco, b'{}', str(servidor.LIMITE_CORPO_BYTES + 1))
+    assert status == 413
+
+def test_falha_inesperada_vira_500(endereco, monkeypatch):
+    def falhar(pedido):
+        raise RuntimeError('falha simulada')
+    monkeypatch.setattr(servidor, 'responder', falhar)
+    monkeypatch.setattr(servidor, 'responder_lote', falhar)
+    for corpo in (b'{"consulta": "metricas"}', b'[{"consulta": "metricas"}]'):
+        status, resposta = enviar_post(endereco, corpo, str(len(corpo)))
+        assert status == 500
+        assert 'falha simulada' not in resposta['erro']
+    conexao = http.client.HTTPConnection(*endereco, timeout=10)
+    conexao.request('GET', '/consultas/metricas')
+    assert conexao.getresponse().status == 500
+    conexao.close()
+
+def test_pedido_invalido_continua_400(endereco):
+    corpo = b'{"consulta": "nao_existe"}'
+    status, resposta = enviar_post(endereco, corpo, str(len(corpo)))
+    assert status == 400
+    assert resposta['erro']